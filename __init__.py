@@ -7,6 +7,7 @@ import bpy
 
 sys.path.append(os.path.dirname(__file__))
 import operators
+import panels
 
 bl_info = {
     "name": "Hydridic Blender",
@@ -51,13 +52,17 @@ def menu_func_import(self, context):
         operators.HYDRIDIC_OT_import_chemical_structure.bl_idname,
         text="Chemical Structure",
     )
+    layout.operator(
+        operators.HYDRIDIC_OT_import_volumetric_data.bl_idname,
+        text="Volumetric Data (cube, CHGCAR)",
+    )
 
 
 # =======================
 # Register those classes!
 
 classes = (HYDRIDIC_UL_preferences,)
-modules = (operators,)
+modules = (operators, panels)
 
 
 def register():
@@ -6,10 +6,17 @@ import sys
 import subprocess
 import importlib
 
+import numpy as np
 import bpy
 import bpy_extras
 
+import utils.atom_filters
+import utils.bond_styles
 import utils.chemical
+import utils.contacts
+import utils.footprint
+import utils.polyhedra
+import utils.volumetric
 
 DEPENDENCIES = ("ase",)
 
@@ -57,6 +64,44 @@ class HYDRIDIC_OT_install_dependencies(bpy.types.Operator):
         return {"FINISHED"}
 
 
+BOND_STYLES = {"FRUSTUM": utils.bond_styles.FrustumBond,
+               "INSTANCED": utils.bond_styles.InstancedFrustumBond}
+BOND_STYLE_ITEMS = (("FRUSTUM", "Frustum", "Each bond gets its own frustum mesh"),
+                    ("INSTANCED", "Instanced Frustum", "Bonds share one frustum mesh per pair of elements"))
+REPRESENTATION_ITEMS = (("ATOMS", "Atoms", "Draw every atom and bond"),
+                        ("CA_TRACE", "CA Trace", "Draw one bead per residue, on its alpha carbon"),
+                        ("RESIDUE_BEADS", "Residue Beads", "Draw one bead per residue, on its centroid"))
+CROP_ITEMS = (("NONE", "None", "Keep atoms regardless of where they are"),
+              ("BOX", "Box", "Keep the atoms inside a box"),
+              ("SPHERE", "Sphere", "Keep the atoms inside a sphere"))
+ELEMENTS_DESCRIPTION = "Chemical symbols separated by commas or spaces, e.g. 'C, N, O'"
+INDICES_DESCRIPTION = "Indices of the atoms to keep, counting from 0 in file order, e.g. '0-99, 250'"
+TRAJECTORY_DESCRIPTION = "Read every frame in the file, and update atoms and bonds as the scene's frame changes"
+RESIDUES_DESCRIPTION = "Residue numbers drawn atom-by-atom in coarse-grained representations, e.g. '10-20, 45'"
+
+
+def _parse_ranges(text: str) -> np.ndarray:
+    """Parses a comma-separated list of integers and inclusive ranges, such as "1-5, 8, 10-12".
+
+    Args:
+        text (str): Text typed in by the user.
+
+    Raises:
+        ValueError: If part of the text isn't an integer or a range of integers.
+
+    Returns:
+        np.ndarray: Every integer listed, in the order given.
+    """
+    values = []
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        start, _, end = part.partition("-")
+        try:
+            values.extend(range(int(start), int(end or start) + 1))
+        except ValueError:
+            raise ValueError(f"'{part}' is not an integer or a range of integers")
+    return np.array(values, dtype=int)
+
+
 class HYDRIDIC_OT_import_chemical_structure(bpy.types.Operator,
                                             bpy_extras.io_utils.ImportHelper):
     """Import a chemical structure into Blender. Supports all ASE-supported formats."""
@@ -64,17 +109,298 @@ class HYDRIDIC_OT_import_chemical_structure(bpy.types.Operator,
     bl_idname = "hydridic.import_chemical_structure"
     bl_label = "Import Chemical"
 
+    representation: bpy.props.EnumProperty(name="Representation", items=REPRESENTATION_ITEMS)  # noqa: F821
+    bond_style: bpy.props.EnumProperty(name="Bond Style", items=BOND_STYLE_ITEMS)  # noqa: F722
+    trajectory: bpy.props.BoolProperty(name="Import Trajectory", description=TRAJECTORY_DESCRIPTION)  # noqa: F722
+    backbone_tube: bpy.props.BoolProperty(name="Backbone Tube", default=False)  # noqa: F722
+    detailed_residues: bpy.props.StringProperty(name="Detailed Residues", description=RESIDUES_DESCRIPTION)  # noqa: F722
+
+    # Filters, applied to the atoms as soon as they're read
+    include_elements: bpy.props.StringProperty(name="Only Elements", description=ELEMENTS_DESCRIPTION)  # noqa: F722
+    exclude_elements: bpy.props.StringProperty(name="Exclude Elements", description=ELEMENTS_DESCRIPTION)  # noqa: F722
+    strip_hydrogens: bpy.props.BoolProperty(name="Strip Hydrogens", default=False)  # noqa: F722
+    atom_indices: bpy.props.StringProperty(name="Atom Indices", description=INDICES_DESCRIPTION)  # noqa: F722
+    crop: bpy.props.EnumProperty(name="Crop", items=CROP_ITEMS, default="NONE")  # noqa: F821
+    crop_center: bpy.props.FloatVectorProperty(name="Crop Center", default=(0.0, 0.0, 0.0))  # noqa: F722
+    crop_size: bpy.props.FloatVectorProperty(name="Box Size", default=(20.0, 20.0, 20.0), min=0.0)  # noqa: F722
+    crop_radius: bpy.props.FloatProperty(name="Sphere Radius", default=10.0, min=0.0)  # noqa: F722
+
     @classmethod
     def poll(cls, context):
         return True
 
     def execute(self, context):
-        chemical = utils.chemical.Chemical.from_file(self.properties.filepath, bpy.context)
+        try:
+            chemical = utils.chemical.Chemical.from_file(self.properties.filepath, bpy.context,
+                                                         representation=self.representation,
+                                                         detailed_residues=_parse_ranges(self.detailed_residues),
+                                                         backbone_tube=self.backbone_tube,
+                                                         atom_filter=self.atom_filter(),
+                                                         bond_style=BOND_STYLES[self.bond_style](),
+                                                         trajectory=self.trajectory)
+        except ValueError as error:
+            self.report({"ERROR"}, str(error))
+            return {"CANCELLED"}
+        chemical.add_structure_to_scene()
+
+        if chemical.trajectory is not None:
+            # Make sure the whole trajectory fits in the scene's frame range
+            last_frame = chemical.first_frame + len(chemical.trajectory) - 1
+            context.scene.frame_end = max(context.scene.frame_end, last_frame)
+        return {"FINISHED"}
+
+    def atom_filter(self) -> utils.atom_filters.AtomFilter:
+        """Builds the filter described by the operator's properties. Crops are in the file's coordinates.
+
+        Raises:
+            ValueError: If the elements or indices typed in by the user can't be parsed.
+
+        Returns:
+            utils.atom_filters.AtomFilter: Filter to apply to the atoms once they're read.
+        """
+        center = np.array(self.crop_center)
+        half_size = np.array(self.crop_size) / 2
+        return utils.atom_filters.AtomFilter(
+            include_elements=self.include_elements.replace(",", " ").split(),
+            exclude_elements=self.exclude_elements.replace(",", " ").split(),
+            strip_hydrogens=self.strip_hydrogens,
+            box=(center - half_size, center + half_size) if self.crop == "BOX" else None,
+            sphere=(center, self.crop_radius) if self.crop == "SPHERE" else None,
+            indices=_parse_ranges(self.atom_indices) if self.atom_indices.strip() else None)
+
+
+VOLUMETRIC_FILTER = "*.cube;*.cub;*CHGCAR*;*PARCHG*;*LOCPOT*;*ELFCAR*;*AECCAR*"
+ISOVALUE_DESCRIPTION = "Value the surface is drawn at, in the file's units (e/Angstrom^3 for VASP densities)"
+ORBITAL_DESCRIPTION = "Which orbital to draw, counting from 0, for cube files that store several"
+DOWNSAMPLE_DESCRIPTION = "Only use every n-th grid point along each axis, for quicker, coarser surfaces"
+
+
+class HYDRIDIC_OT_import_volumetric_data(bpy.types.Operator,
+                                         bpy_extras.io_utils.ImportHelper):
+    """Import a structure along with volumetric data (Gaussian cube, VASP CHGCAR), drawn as isosurfaces."""
+
+    bl_idname = "hydridic.import_volumetric_data"
+    bl_label = "Import Volumetric Data"
+
+    filter_glob: bpy.props.StringProperty(default=VOLUMETRIC_FILTER, options={"HIDDEN"})  # noqa: F821
+    isovalue: bpy.props.FloatProperty(name="Isovalue", default=0.05, description=ISOVALUE_DESCRIPTION)  # noqa: F821
+    both_signs: bpy.props.BoolProperty(name="Negative Isovalue Too", default=False)  # noqa: F722
+    downsample: bpy.props.IntProperty(name="Downsample", default=1, min=1,  # noqa: F821
+                                      description=DOWNSAMPLE_DESCRIPTION)
+    orbital: bpy.props.IntProperty(name="Orbital", default=0, min=0, description=ORBITAL_DESCRIPTION)  # noqa: F821
+    bond_style: bpy.props.EnumProperty(name="Bond Style", items=BOND_STYLE_ITEMS)  # noqa: F722
+
+    def execute(self, context):
+        try:
+            grid = utils.volumetric.VolumetricGrid.from_file(self.properties.filepath, orbital=self.orbital)
+        except (ValueError, OSError) as error:
+            self.report({"ERROR"}, str(error))
+            return {"CANCELLED"}
+
+        # The atoms aren't centered, so that the grid is already in the same frame as them
+        chemical = utils.chemical.Chemical(grid.atoms, bpy.context, bond_style=BOND_STYLES[self.bond_style]())
         chemical.add_structure_to_scene()
+
+        levels = [self.isovalue, -self.isovalue] if self.both_signs else [self.isovalue]
+        for level in levels:
+            utils.volumetric.spawn_isosurface(
+                grid, level,
+                name=f"Isosurface_{level:g}_{chemical.collection_name}",
+                collection=chemical.collection,
+                step=self.downsample,
+                location=chemical.origin,
+                material=utils.chemical.material_factory.get_isosurface_material(level >= 0),
+                flip_normals=level < 0)
+        return {"FINISHED"}
+
+
+QUERY_ITEMS = (("RADIUS", "Within Radius", "Atoms within a distance of the reference"),
+               ("NEAREST", "Nearest", "The atoms closest to the reference"),
+               ("BOX", "In Box", "Atoms inside a box centered on the 3D cursor"))
+REFERENCE_ITEMS = (("CURSOR", "3D Cursor", "Measure from the 3D cursor"),
+                   ("SELECTION", "Selected Atoms", "Measure from the atoms currently selected in edit mode"))
+ACTION_ITEMS = (("SELECT", "Select", "Select the atoms and their bonds"),
+                ("HIDE", "Hide", "Move the atoms and their bonds to a hidden collection"),
+                ("SPLIT", "Split", "Move the atoms and their bonds to a new collection"))
+
+
+class HYDRIDIC_OT_spatial_query(bpy.types.Operator):
+    """Select, hide, or split off the atoms of a chemical that lie in a region around the 3D cursor or the
+    selected atoms. Acts on the chemical that the active object belongs to."""
+
+    bl_idname = "hydridic.spatial_query"
+    bl_label = "Query Atoms by Region"
+    bl_options = {"REGISTER", "UNDO"}
+
+    query: bpy.props.EnumProperty(name="Query", items=QUERY_ITEMS, default="RADIUS")  # noqa: F821
+    reference: bpy.props.EnumProperty(name="Reference", items=REFERENCE_ITEMS, default="CURSOR")  # noqa: F821
+    action: bpy.props.EnumProperty(name="Action", items=ACTION_ITEMS, default="SELECT")  # noqa: F821
+    radius: bpy.props.FloatProperty(name="Radius", default=8.0, min=0.0, unit="LENGTH")  # noqa: F821
+    count: bpy.props.IntProperty(name="Count", default=1, min=1)  # noqa: F821
+    box_size: bpy.props.FloatVectorProperty(name="Box Size", default=(10.0, 10.0, 10.0), min=0.0)  # noqa: F722
+
+    @classmethod
+    def poll(cls, context):
+        return (context.active_object is not None
+                and utils.chemical.Chemical.from_object(context.active_object) is not None)
+
+    def execute(self, context):
+        chemical = utils.chemical.Chemical.from_object(context.active_object)
+        cursor = np.array(context.scene.cursor.location) - chemical.origin
+
+        if self.reference == "SELECTION" and self.query != "BOX":
+            selected = chemical.selected_atom_indices()
+            if len(selected) == 0:
+                self.report({"WARNING"}, "No atoms are selected")
+                return {"CANCELLED"}
+            points = chemical.atoms.positions[selected]
+        else:
+            points = cursor
+
+        if self.query == "RADIUS":
+            atom_indices = chemical.spatial_index.within_radius(points, self.radius)
+        elif self.query == "NEAREST":
+            _, atom_indices = chemical.spatial_index.nearest(points, self.count)
+            atom_indices = np.unique(atom_indices)
+        else:
+            half_size = np.array(self.box_size) / 2
+            atom_indices = chemical.spatial_index.within_box(cursor - half_size, cursor + half_size)
+
+        if self.action == "SELECT":
+            chemical.select_atoms(atom_indices)
+        elif self.action == "HIDE":
+            chemical.hide_atoms(atom_indices)
+        else:
+            chemical.split_atoms(atom_indices)
+        self.report({"INFO"}, f"{len(atom_indices)} atoms found")
+        return {"FINISHED"}
+
+
+class HYDRIDIC_OT_coordination_polyhedra(bpy.types.Operator):
+    """Draw coordination polyhedra around the atoms of some elements, from the atoms bonded to them.
+    Acts on the chemical that the active object belongs to."""
+
+    bl_idname = "hydridic.coordination_polyhedra"
+    bl_label = "Add Coordination Polyhedra"
+    bl_options = {"REGISTER", "UNDO"}
+
+    central_elements: bpy.props.StringProperty(name="Central Elements", description=ELEMENTS_DESCRIPTION)  # noqa: F722
+    ligand_elements: bpy.props.StringProperty(name="Corner Elements", description=ELEMENTS_DESCRIPTION,  # noqa: F722
+                                              default="O")  # noqa: F821
+    min_coordination: bpy.props.IntProperty(name="Minimum Coordination", default=4, min=3)  # noqa: F722
+
+    @classmethod
+    def poll(cls, context):
+        return (context.active_object is not None
+                and utils.chemical.Chemical.from_object(context.active_object) is not None)
+
+    def execute(self, context):
+        chemical = utils.chemical.Chemical.from_object(context.active_object)
+        try:
+            polyhedra = utils.polyhedra.CoordinationPolyhedra(
+                central_elements=self.central_elements.replace(",", " ").split(),
+                ligand_elements=self.ligand_elements.replace(",", " ").split(),
+                min_coordination=self.min_coordination)
+        except ValueError as error:
+            self.report({"ERROR"}, str(error))
+            return {"CANCELLED"}
+        objects = polyhedra.spawn(chemical, utils.chemical.material_factory)
+        if not objects:
+            self.report({"WARNING"}, "No sites with enough bonded corners were found")
+        return {"FINISHED"}
+
+
+CONTACT_ITEMS = (("HYDROGEN_BONDS", "Hydrogen Bonds", "Donor-H···acceptor geometries, drawn from H to the acceptor"),
+                 ("CLOSE_CONTACTS", "Close Contacts", "Atoms closer than the sum of their Van der Waals radii"))
+
+
+class HYDRIDIC_OT_find_contacts(bpy.types.Operator):
+    """Draw the hydrogen bonds or close contacts between atoms as dashed lines, all in one object.
+    Acts on the chemical that the active object belongs to."""
+
+    bl_idname = "hydridic.find_contacts"
+    bl_label = "Find Contacts"
+    bl_options = {"REGISTER", "UNDO"}
+
+    kind: bpy.props.EnumProperty(name="Contacts", items=CONTACT_ITEMS, default="HYDROGEN_BONDS")  # noqa: F821
+    dashed: bpy.props.BoolProperty(name="Dashed", default=True)  # noqa: F821
+    max_hydrogen_acceptor: bpy.props.FloatProperty(name="Max H···A", default=2.5, min=0.0)  # noqa: F722
+    max_donor_acceptor: bpy.props.FloatProperty(name="Max D···A", default=3.5, min=0.0)  # noqa: F722
+    min_angle: bpy.props.FloatProperty(name="Min D-H···A Angle", default=120.0, min=0.0, max=180.0)  # noqa: F722
+    contact_overlap: bpy.props.FloatProperty(name="Van der Waals Overlap", default=0.0)  # noqa: F722
+
+    @classmethod
+    def poll(cls, context):
+        return (context.active_object is not None
+                and utils.chemical.Chemical.from_object(context.active_object) is not None)
+
+    def execute(self, context):
+        chemical = utils.chemical.Chemical.from_object(context.active_object)
+        contacts = chemical.contacts
+        contacts.max_hydrogen_acceptor = self.max_hydrogen_acceptor
+        contacts.max_donor_acceptor = self.max_donor_acceptor
+        contacts.min_angle = self.min_angle
+        contacts.contact_overlap = self.contact_overlap
+
+        if self.kind == "HYDROGEN_BONDS":
+            atom_indices, vectors = contacts.hydrogen_bonds()
+            starts = chemical.atoms.positions[atom_indices[:, 1]]
+        else:
+            atom_indices, vectors = contacts.close_contacts()
+            starts = chemical.atoms.positions[atom_indices[:, 0]]
+        if len(atom_indices) == 0:
+            self.report({"WARNING"}, "No contacts found")
+            return {"CANCELLED"}
+
+        material = utils.chemical.material_factory.get_contact_material(self.kind, chemical.name)
+        utils.contacts.spawn_contacts(starts, vectors,
+                                      name=f"Contacts_{self.kind.lower()}_{chemical.collection_name}",
+                                      collection=chemical.collection,
+                                      dashed=self.dashed,
+                                      location=chemical.origin,
+                                      material=material)
+        self.report({"INFO"}, f"{len(atom_indices)} contacts found")
+        return {"FINISHED"}
+
+
+class HYDRIDIC_OT_refresh_footprint(bpy.types.Operator):
+    """Measure the objects, vertices, triangles, materials and mesh memory of every chemical in the scene"""
+
+    bl_idname = "hydridic.refresh_footprint"
+    bl_label = "Refresh Footprint"
+
+    def execute(self, context):
+        footprints = utils.footprint.refresh_footprints(context)
+        total_triangles = sum(footprint.triangles for footprint in footprints.values())
+        self.report({"INFO"}, f"{len(footprints)} chemicals, {total_triangles} triangles")
         return {"FINISHED"}
 
 
 classes = (HYDRIDIC_OT_install_dependencies,
-           HYDRIDIC_OT_import_chemical_structure)
+           HYDRIDIC_OT_import_chemical_structure,
+           HYDRIDIC_OT_import_volumetric_data,
+           HYDRIDIC_OT_spatial_query,
+           HYDRIDIC_OT_coordination_polyhedra,
+           HYDRIDIC_OT_find_contacts,
+           HYDRIDIC_OT_refresh_footprint)
+
+register_classes, unregister_classes = bpy.utils.register_classes_factory(classes)
+
+
+@bpy.app.handlers.persistent
+def update_trajectories(scene: bpy.types.Scene, *args) -> None:
+    """Frame change handler for trajectories. It's persistent, so it keeps running after File > New or Open."""
+    utils.chemical.update_trajectories(scene, *args)
+
+
+def register():
+    """Makes the operators available to blender, and starts following the frame for trajectories"""
+    register_classes()
+    bpy.app.handlers.frame_change_post.append(update_trajectories)
+
 
-register, unregister = bpy.utils.register_classes_factory(classes)
+def unregister():
+    """Makes the operators unavailable to blender, and stops following the frame for trajectories"""
+    if update_trajectories in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.remove(update_trajectories)
+    unregister_classes()
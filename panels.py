@@ -0,0 +1,40 @@
+"""
+Blender panel classes are in this file
+"""
+import bpy
+
+import operators
+import utils.footprint
+
+
+class HYDRIDIC_PT_footprint(bpy.types.Panel):
+    """Sidebar panel listing how heavy each imported chemical is to render.
+    Only shows the last measurement, so redrawing it doesn't walk the scene."""
+
+    bl_label = "Scene Footprint"
+    bl_idname = "HYDRIDIC_PT_footprint"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "Hydridic"
+
+    def draw(self, context):
+        layout = self.layout
+        layout.operator(operators.HYDRIDIC_OT_refresh_footprint.bl_idname, icon="FILE_REFRESH")
+
+        footprints = utils.footprint.cached_footprints()
+        if not footprints:
+            layout.label(text="Refresh to measure the scene")
+        for collection_name, footprint in footprints.items():
+            box = layout.box()
+            box.label(text=collection_name.replace(utils.footprint.CHEMICAL_COLLECTION_PREFIX, ""), icon="MESH_DATA")
+            column = box.column(align=True)
+            column.label(text=f"Objects: {footprint.objects:,}")
+            column.label(text=f"Vertices: {footprint.vertices:,}")
+            column.label(text=f"Triangles: {footprint.triangles:,}")
+            column.label(text=f"Materials: {footprint.materials:,}")
+            column.label(text=f"Mesh Memory: {footprint.mesh_bytes / 2 ** 20:,.1f} MiB")
+
+
+classes = (HYDRIDIC_PT_footprint,)
+
+register, unregister = bpy.utils.register_classes_factory(classes)
@@ -0,0 +1,54 @@
+"""
+Tests functionality related to filtering atoms at import time
+"""
+import sys
+
+import numpy as np
+import pytest
+
+from fixtures import molecule_ethanol, protein_1l2y
+import config
+
+sys.path.append(config.project_root)
+
+from utils.atom_filters import AtomFilter
+
+
+def test_empty_filter_returns_same_atoms(molecule_ethanol):
+    atom_filter = AtomFilter()
+    assert atom_filter.is_empty
+    assert atom_filter.apply(molecule_ethanol) is molecule_ethanol
+
+
+def test_strip_hydrogens(protein_1l2y):
+    filtered = AtomFilter(strip_hydrogens=True).apply(protein_1l2y)
+    assert "H" not in filtered.get_chemical_symbols()
+    assert len(filtered) == np.count_nonzero(protein_1l2y.numbers != 1)
+
+
+def test_include_and_exclude_elements(protein_1l2y):
+    filtered = AtomFilter(include_elements=["C", "N", "O"], exclude_elements=["O"]).apply(protein_1l2y)
+    assert set(filtered.get_chemical_symbols()) == {"C", "N"}
+
+
+def test_sphere_crop(protein_1l2y):
+    center = protein_1l2y.positions[0]
+    filtered = AtomFilter(sphere=(center, 5.0)).apply(protein_1l2y)
+    assert 0 < len(filtered) < len(protein_1l2y)
+    assert np.all(np.linalg.norm(filtered.positions - center, axis=1) <= 5.0)
+
+
+def test_box_crop(protein_1l2y):
+    filtered = AtomFilter(box=((-5, -5, -5), (5, 5, 5))).apply(protein_1l2y)
+    assert np.all(np.abs(filtered.positions) <= 5)
+
+
+def test_indices_keep_extra_arrays(protein_1l2y):
+    filtered = AtomFilter(indices=[0, 1, 2, 10_000]).apply(protein_1l2y)
+    assert len(filtered) == 3
+    np.testing.assert_array_equal(filtered.arrays["residuenumbers"], protein_1l2y.arrays["residuenumbers"][:3])
+
+
+def test_rejects_unknown_elements():
+    with pytest.raises(ValueError):
+        AtomFilter(include_elements=["Xx"])
@@ -6,15 +6,16 @@ import typing
 import copy
 import pytest
 import mock
+import numpy as np
 
 from fixtures import mock_chemical, mock_atom, molecule_ethanol_bonds, molecule_ethanol
-from fixtures import mock_bondstyle
+from fixtures import mock_bondstyle, mof_nmgc, superconductor_123
 import config
 
 sys.path.append(config.project_root)
 
-from utils.bond import BondBag, Bond
-from utils.bond_styles import BondStyle
+from utils.bond import BondBag, Bond, VerletBondList
+from utils.bond_styles import BondStyle, FrustumBond, InstancedFrustumBond, frustum_vertices, frustum_faces
 
 
 @pytest.fixture()
@@ -65,3 +66,149 @@ def test_bond_calls_spawn_from_atoms(mock_bondstyle):
                 bond_style=mock_bondstyle)
     bond.draw()
     assert mock_bondstyle.spawn_bond_from_atoms.called
+
+
+def test_bondbag_restyles_only_changed_bonds(bond_bag):
+    bonds = bond_bag.bonds
+    for index, bond in enumerate(bonds):
+        bond.blender_object = mock.Mock()
+        bond.drawn_style = FrustumBond(scale_factor=0.5 if index % 2 else 0.25)
+
+    new_style = FrustumBond(scale_factor=0.5)
+    with mock.patch.object(FrustumBond, "restyle_bonds") as restyle_bonds:
+        bond_bag.bond_style = new_style
+    restyled = restyle_bonds.call_args[0][0]
+    assert restyled == bonds[::2]
+
+
+def test_bondbag_skips_restyle_of_undrawn_bonds(bond_bag):
+    throwaway = bond_bag.bonds
+    with mock.patch.object(FrustumBond, "restyle_bonds") as restyle_bonds:
+        bond_bag.bond_style = FrustumBond(scale_factor=0.5)
+    assert not restyle_bonds.called
+
+
+def test_frustum_vertices_match_radii_and_depth():
+    vertices = frustum_vertices([0.1, 0.2], [0.3, 0.4], [1.0, 2.0], num_vertices=8)
+    assert vertices.shape == (2, 18, 3)
+    np.testing.assert_allclose(np.linalg.norm(vertices[:, :8, :2], axis=2), [[0.1] * 8, [0.2] * 8])
+    np.testing.assert_allclose(np.linalg.norm(vertices[:, 8:16, :2], axis=2), [[0.3] * 8, [0.4] * 8])
+    np.testing.assert_allclose(vertices[:, :, 2].max(axis=1) - vertices[:, :, 2].min(axis=1), [1.0, 2.0])
+
+
+def test_frustum_faces_cover_every_vertex():
+    faces, face_sizes = frustum_faces(8)
+    assert face_sizes.sum() == len(faces)
+    assert set(faces) == set(range(18))
+
+
+def test_instanced_style_is_distinct_from_frustum():
+    assert InstancedFrustumBond() != FrustumBond()
+    assert InstancedFrustumBond() == InstancedFrustumBond()
+
+
+def test_instanced_restyle_shares_prototypes(bond_bag):
+    bonds = bond_bag.bonds
+    for bond in bonds:
+        bond.blender_object = mock.Mock()
+        bond.drawn_style = FrustumBond()
+
+    prototypes = {}
+    with mock.patch.object(InstancedFrustumBond, "prototype_mesh",
+                           side_effect=lambda start, end: prototypes.setdefault((start, end), mock.Mock())):
+        bond_bag.bond_style = InstancedFrustumBond()
+
+    assert len(prototypes) < len(bonds)
+    for bond in bonds:
+        key = (bond.source_atom.number, bond.destination_atom.number)
+        assert bond.blender_object.data is prototypes[key]
+        length = np.linalg.norm(bond.destination_atom.position - bond.source_atom.position)
+        assert bond.blender_object.scale == (1, 1, pytest.approx(length))
+
+
+def test_instanced_restyle_removes_orphaned_meshes(bond_bag):
+    bonds = bond_bag.bonds
+    old_meshes = []
+    for index, bond in enumerate(bonds):
+        # Every other bond shares its mesh with something else, so only the rest are orphaned
+        old_meshes.append(mock.Mock(users=index % 2))
+        bond.blender_object = mock.Mock(data=old_meshes[-1])
+        bond.drawn_style = FrustumBond()
+
+    with mock.patch.object(InstancedFrustumBond, "prototype_mesh", return_value=mock.Mock()), \
+            mock.patch("utils.bond_styles.bpy.data") as data:
+        bond_bag.bond_style = InstancedFrustumBond()
+
+    removed = [call[0][0] for call in data.meshes.remove.call_args_list]
+    assert removed == old_meshes[::2]
+
+
+def test_fallback_move_removes_orphaned_meshes(mock_bondstyle):
+    bonds, old_meshes = [], []
+    for users in (0, 1):
+        old_meshes.append(mock.Mock(users=users))
+        bond = Bond(source_atom=mock_atom, destination_atom=mock_atom, bond_style=mock_bondstyle)
+        bond.blender_object = mock.Mock(data=old_meshes[-1])
+        bonds.append(bond)
+
+    with mock.patch("utils.bond_styles.bpy.data") as data:
+        BondStyle.move_bonds(mock_bondstyle, bonds)
+
+    assert data.objects.remove.call_count == 2
+    assert [call[0][0] for call in data.meshes.remove.call_args_list] == old_meshes[:1]
+    assert all(bond.blender_object is mock_bondstyle.spawn_bond_from_atoms.return_value for bond in bonds)
+
+
+@pytest.mark.parametrize("structure", ["molecule_ethanol", "mof_nmgc", "superconductor_123"])
+def test_verlet_list_matches_bondbag(structure, request):
+    atoms = request.getfixturevalue(structure)
+    bag = BondBag(mock.Mock(atoms=atoms))
+    expected = {tuple(sorted(pair)) for pair in bag.pairs.tolist()}
+    found = {tuple(pair) for pair in VerletBondList(atoms).bonded_pairs(atoms).tolist()}
+    assert found == expected
+
+
+def test_verlet_list_rebuilds_only_past_half_skin(molecule_ethanol):
+    verlet_list = VerletBondList(molecule_ethanol, skin=0.5)
+    verlet_list.bonded_pairs(molecule_ethanol)
+    molecule_ethanol.positions[0] += (0.2, 0, 0)
+    verlet_list.bonded_pairs(molecule_ethanol)
+    assert verlet_list.num_rebuilds == 1
+    molecule_ethanol.positions[0] += (0.2, 0, 0)
+    verlet_list.bonded_pairs(molecule_ethanol)
+    assert verlet_list.num_rebuilds == 2
+
+
+def test_update_topology_breaks_stretched_bond(bond_bag):
+    atoms = bond_bag._chemical.atoms
+    original_count = len(bond_bag)
+    hydroxyl_hydrogen = 8
+    atoms.positions[hydroxyl_hydrogen] += (5, 0, 0)
+
+    formed, broken = bond_bag.update_topology()
+    assert formed == []
+    assert len(broken) == 1
+    assert hydroxyl_hydrogen in (broken[0].source_atom.index, broken[0].destination_atom.index)
+    assert len(bond_bag) == original_count - 1
+    assert bond_bag.adjacency_matrix.nnz == original_count - 1
+
+
+def test_update_topology_moves_drawn_bonds(bond_bag):
+    for bond in bond_bag.bonds:
+        bond.blender_object = mock.Mock()
+    with mock.patch.object(FrustumBond, "move_bonds") as move_bonds:
+        bond_bag.update_topology()
+    assert len(move_bonds.call_args[0][0]) == len(bond_bag)
+
+
+@pytest.mark.parametrize("users,is_removed", [(0, True), (3, False)])
+def test_update_topology_removes_unused_meshes_of_broken_bonds(bond_bag, users, is_removed):
+    for bond in bond_bag.bonds:
+        bond.blender_object = mock.Mock(data=mock.Mock(users=users))
+    atoms = bond_bag._chemical.atoms
+    atoms.positions[8] += (5, 0, 0)
+
+    with mock.patch.object(FrustumBond, "move_bonds"), mock.patch("utils.bond_styles.bpy.data") as data:
+        _, broken = bond_bag.update_topology()
+    assert data.objects.remove.call_count == len(broken) == 1
+    assert data.meshes.remove.called is is_removed
@@ -0,0 +1,104 @@
+"""
+Tests functionality related to chemicals
+"""
+import sys
+
+import ase.io
+import mock
+import numpy as np
+import pytest
+
+from fixtures import protein_1l2y, molecule_ethanol
+import config
+
+sys.path.append(config.project_root)
+
+from utils.atom_filters import AtomFilter
+from utils.chemical import Chemical, group_by_atomic_number, read_trajectory, TRAJECTORY_INITIAL_FRAMES
+
+
+def test_groups_cover_every_atom_once(protein_1l2y):
+    groups = group_by_atomic_number(protein_1l2y.numbers)
+    all_indices = np.concatenate([indices for _, indices in groups])
+    np.testing.assert_array_equal(np.sort(all_indices), np.arange(len(protein_1l2y)))
+
+
+def test_groups_are_homonuclear_and_ordered(protein_1l2y):
+    groups = group_by_atomic_number(protein_1l2y.numbers)
+    assert [number for number, _ in groups] == sorted(set(protein_1l2y.numbers))
+    for number, indices in groups:
+        assert np.all(protein_1l2y.numbers[indices] == number)
+        assert np.all(np.diff(indices) > 0)
+
+
+def registered_chemical(collection_name, object_names=(), deleted=False):
+    chemical = Chemical.__new__(Chemical)
+    chemical.collection = mock.Mock()
+    if deleted:
+        type(chemical.collection).all_objects = mock.PropertyMock(side_effect=ReferenceError)
+    else:
+        chemical.collection.all_objects = list(object_names)
+    Chemical.registry[collection_name] = chemical
+    return chemical
+
+
+@pytest.fixture
+def empty_registry():
+    saved = dict(Chemical.registry)
+    Chemical.registry.clear()
+    yield Chemical.registry
+    Chemical.registry.clear()
+    Chemical.registry.update(saved)
+
+
+def test_deleted_chemicals_leave_the_registry(empty_registry):
+    alive = registered_chemical("alive", ["atoms"])
+    registered_chemical("deleted", deleted=True)
+    assert Chemical.registered() == [alive]
+    assert list(empty_registry) == ["alive"]
+
+
+def test_from_object_skips_deleted_chemicals(empty_registry):
+    registered_chemical("deleted", deleted=True)
+    alive = registered_chemical("alive", ["atoms"])
+    blender_object = mock.Mock()
+    blender_object.name = "atoms"
+    assert Chemical.from_object(blender_object) is alive
+    blender_object.name = "elsewhere"
+    assert Chemical.from_object(blender_object) is None
+    assert list(empty_registry) == ["alive"]
+
+
+def test_select_atoms_only_visits_affected_bonds():
+    chemical = Chemical.__new__(Chemical)
+    bonds = [mock.Mock() for _ in range(4)]
+    chemical._Chemical__point_clouds = []
+    chemical._Chemical__selected_bonds = []
+    chemical._Chemical__bonds = mock.Mock()
+    chemical._Chemical__bonds.__iter__ = mock.Mock(side_effect=AssertionError("walked every bond"))
+
+    chemical._Chemical__bonds.incident_bonds.return_value = bonds[:2]
+    chemical.select_atoms(np.array([0]))
+    chemical._Chemical__bonds.incident_bonds.return_value = bonds[1:3]
+    chemical.select_atoms(np.array([1]))
+
+    assert bonds[0].blender_object.select_set.call_args_list == [mock.call(True), mock.call(False)]
+    assert bonds[1].blender_object.select_set.call_args_list == [mock.call(True), mock.call(True)]
+    assert bonds[2].blender_object.select_set.call_args_list == [mock.call(True)]
+    assert not bonds[3].blender_object.select_set.called
+
+
+def test_read_trajectory_keeps_filtered_positions_of_every_frame(molecule_ethanol, tmp_path):
+    images = []
+    for frame in range(TRAJECTORY_INITIAL_FRAMES + 5):
+        image = molecule_ethanol.copy()
+        image.positions += 0.01 * frame
+        images.append(image)
+    path = str(tmp_path / "trajectory.xyz")
+    ase.io.write(path, images)
+
+    atoms, frames = read_trajectory(path, AtomFilter(strip_hydrogens=True))
+    is_heavy = molecule_ethanol.numbers != 1
+    assert atoms.get_chemical_formula() == molecule_ethanol[is_heavy].get_chemical_formula()
+    expected = np.stack([image.positions[is_heavy] for image in images])
+    np.testing.assert_allclose(frames, expected, atol=1e-6)
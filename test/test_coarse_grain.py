@@ -0,0 +1,68 @@
+"""
+Tests functionality related to coarse-grained biomolecules
+"""
+import sys
+
+import numpy as np
+import pytest
+
+from fixtures import protein_1l2y, molecule_ethanol
+import config
+
+sys.path.append(config.project_root)
+
+from utils.coarse_grain import CoarseGrainedStructure
+
+
+@pytest.fixture()
+def coarse_protein(protein_1l2y):
+    yield CoarseGrainedStructure(protein_1l2y)
+
+
+def test_groups_atoms_into_residues(coarse_protein, protein_1l2y):
+    assert coarse_protein.num_residues == len(set(protein_1l2y.arrays["residuenumbers"]))
+    assert coarse_protein.num_chains == 1
+
+
+def test_alpha_carbon_positions(coarse_protein, protein_1l2y):
+    is_alpha_carbon = protein_1l2y.arrays["atomtypes"] == "CA"
+    np.testing.assert_allclose(coarse_protein.alpha_carbon_positions(), protein_1l2y.positions[is_alpha_carbon])
+
+
+def test_centroids_lie_within_residues(coarse_protein, protein_1l2y):
+    centroids = coarse_protein.centroids()
+    first_residue = protein_1l2y.positions[coarse_protein.residue_of_atom == 0]
+    np.testing.assert_allclose(centroids[0], first_residue.mean(axis=0))
+
+
+def test_restarted_numbering_starts_new_chain(protein_1l2y):
+    dimer = protein_1l2y + protein_1l2y
+    dimer.positions[len(protein_1l2y):] += 50
+    coarse_dimer = CoarseGrainedStructure(dimer)
+    assert coarse_dimer.num_chains == 2
+    assert len(coarse_dimer.backbone(1)) == len(coarse_dimer.backbone(0))
+
+
+def test_atom_mask_selects_residues(coarse_protein, protein_1l2y):
+    mask = coarse_protein.atom_mask([1, 2])
+    assert set(protein_1l2y.arrays["residuenumbers"][mask]) == {1, 2}
+
+
+def test_requires_residue_information(molecule_ethanol):
+    with pytest.raises(ValueError):
+        CoarseGrainedStructure(molecule_ethanol)
+
+
+def test_released_structure_still_draws(coarse_protein):
+    centroids = coarse_protein.centroids()
+    alpha_carbons = coarse_protein.alpha_carbon_positions()
+    backbones = [coarse_protein.backbone(chain) for chain in range(coarse_protein.num_chains)]
+    coarse_protein.release_atoms()
+
+    assert coarse_protein.atoms is None
+    np.testing.assert_array_equal(coarse_protein.centroids(), centroids)
+    np.testing.assert_array_equal(coarse_protein.alpha_carbon_positions(), alpha_carbons)
+    for chain, backbone in enumerate(backbones):
+        np.testing.assert_array_equal(coarse_protein.backbone(chain), backbone)
+    with pytest.raises(ValueError):
+        coarse_protein.atom_mask([1])
@@ -0,0 +1,93 @@
+"""
+Tests functionality related to non-covalent contacts
+"""
+import sys
+
+import mock
+import numpy as np
+import pytest
+import ase
+import scipy.sparse.csgraph
+
+from fixtures import molecule_ethanol
+import config
+
+sys.path.append(config.project_root)
+
+from utils.bond import BondBag
+from utils.contacts import ContactBag, dash_geometry
+
+
+def chemical_with_bonds(atoms):
+    chemical = mock.Mock(atoms=atoms)
+    chemical.bonds = BondBag(chemical)
+    return chemical
+
+
+@pytest.fixture
+def water_dimer():
+    # The first water donates its hydrogen along X to the second one's oxygen
+    return ase.Atoms("OH2OH2", positions=[[0.0, 0.0, 0.0], [0.96, 0.0, 0.0], [-0.24, 0.93, 0.0],
+                                          [2.9, 0.0, 0.0], [3.2, 0.75, 0.5], [3.2, -0.75, 0.5]])
+
+
+def test_water_dimer_hydrogen_bond(water_dimer):
+    contacts = ContactBag(chemical_with_bonds(water_dimer))
+    triplets, vectors = contacts.hydrogen_bonds()
+    np.testing.assert_array_equal(triplets, [[0, 1, 3]])
+    np.testing.assert_allclose(vectors, [[1.94, 0.0, 0.0]])
+
+
+def test_hydrogen_bond_angle_criterion():
+    # The acceptor sits beside the hydrogen, at a right angle to the O-H bond
+    atoms = ase.Atoms("OH2O", positions=[[0.0, 0.0, 0.0], [0.96, 0.0, 0.0], [-0.24, 0.93, 0.0], [0.96, -1.9, 0.0]])
+    assert len(ContactBag(chemical_with_bonds(atoms)).hydrogen_bonds()[0]) == 0
+    assert len(ContactBag(chemical_with_bonds(atoms), min_angle=80).hydrogen_bonds()[0]) == 1
+
+
+def test_hydrogen_bond_across_boundary(water_dimer):
+    # Wrap the acceptor around a periodic boundary, so that it's only close through the minimum image
+    water_dimer.cell = [4.0, 20.0, 20.0]
+    water_dimer.pbc = True
+    water_dimer.positions -= [3.0, 0.0, 0.0]
+    water_dimer.wrap()
+    triplets, vectors = ContactBag(chemical_with_bonds(water_dimer)).hydrogen_bonds()
+    np.testing.assert_array_equal(triplets, [[0, 1, 3]])
+    np.testing.assert_allclose(vectors, [[1.94, 0.0, 0.0]], atol=1e-9)
+
+
+def test_water_dimer_close_contacts(water_dimer):
+    pairs, separations = ContactBag(chemical_with_bonds(water_dimer)).close_contacts()
+    assert [1, 3] in pairs.tolist()
+    assert np.all(pairs[:, 0] < pairs[:, 1])
+    assert np.all(np.isin(pairs[:, 0], [0, 1, 2]) & np.isin(pairs[:, 1], [3, 4, 5]))
+
+
+def test_close_contacts_skip_nearby_atoms(molecule_ethanol):
+    chemical = chemical_with_bonds(molecule_ethanol)
+    contacts = ContactBag(chemical, contact_overlap=-2.0)
+    pairs, _ = contacts.close_contacts()
+    bond_separations = scipy.sparse.csgraph.shortest_path(chemical.bonds.adjacency_matrix, unweighted=True,
+                                                          directed=False)
+    assert len(pairs) > 0
+    assert np.all(bond_separations[pairs[:, 0], pairs[:, 1]] >= contacts.min_bond_separation)
+
+
+def test_dash_geometry():
+    starts = np.array([[0.0, 0.0, 0.0], [1.0, 1.0, 1.0], [5.0, 5.0, 5.0]])
+    vectors = np.array([[0.0, 1.0, 0.0], [0.0, 0.0, 0.1], [0.0, 0.0, 0.0]])
+    vertices, faces, face_sizes = dash_geometry(starts, vectors, radius=0.05, dash_length=0.2, gap_length=0.15,
+                                                num_vertices=8)
+    vertices_per_dash = 2 * 8 + 2
+    # Three dashes fit on the first line, the second gets one short dash, and the third is skipped
+    assert len(vertices) == 4 * vertices_per_dash
+    assert len(face_sizes) == 4 * 3 * 8
+    assert face_sizes.sum() == len(faces)
+    assert faces.max() == len(vertices) - 1
+
+    first_line = vertices[:3 * vertices_per_dash]
+    np.testing.assert_allclose(np.hypot(first_line[:, 0], first_line[:, 2]).max(), 0.05)
+    assert first_line[:, 1].min() == pytest.approx(0.05)
+    assert first_line[:, 1].max() == pytest.approx(0.95)
+    second_line = vertices[3 * vertices_per_dash:]
+    np.testing.assert_allclose([second_line[:, 2].min(), second_line[:, 2].max()], [1.0, 1.1])
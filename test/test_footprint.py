@@ -0,0 +1,81 @@
+"""
+Tests functionality related to measuring the footprint of chemicals
+"""
+import sys
+
+import mock
+import numpy as np
+
+import config
+
+sys.path.append(config.project_root)
+
+from utils.footprint import collection_footprint, measure_mesh, VERTEX_BYTES, EDGE_BYTES, LOOP_BYTES, POLYGON_BYTES
+
+
+class FakeCollection(list):
+    """Stands in for a bpy collection, holding its elements and supporting bulk reads of one attribute"""
+
+    def __init__(self, elements=(), attribute=None, values=()):
+        super().__init__(elements)
+        self.__attribute = attribute
+        self.__values = np.asarray(values)
+
+    def foreach_get(self, attribute, buffer):
+        assert attribute == self.__attribute
+        buffer[:] = self.__values
+
+
+def fake_mesh(name, num_vertices, polygon_sizes):
+    mesh = mock.Mock()
+    mesh.name = name
+    mesh.vertices = FakeCollection(range(num_vertices))
+    mesh.edges = FakeCollection(range(sum(polygon_sizes)))
+    mesh.loops = FakeCollection(range(sum(polygon_sizes)))
+    mesh.polygons = FakeCollection(range(len(polygon_sizes)), "loop_total", polygon_sizes)
+    mesh.materials = []
+    return mesh
+
+
+def fake_object(mesh, instance_type="NONE", children=(), hide_render=False):
+    blender_object = mock.Mock()
+    blender_object.type = "MESH"
+    blender_object.data = mesh
+    blender_object.modifiers = []
+    blender_object.active_material = None
+    blender_object.instance_type = instance_type
+    blender_object.children = list(children)
+    blender_object.hide_render = hide_render
+    return blender_object
+
+
+def test_measure_mesh_counts_triangles():
+    mesh = fake_mesh("cube", 8, [4] * 6)
+    vertices, triangles, mesh_bytes = measure_mesh(mesh)
+    assert vertices == 8
+    assert triangles == 12
+    assert mesh_bytes == 8 * VERTEX_BYTES + 24 * EDGE_BYTES + 24 * LOOP_BYTES + 6 * POLYGON_BYTES
+
+
+def test_footprint_counts_instances():
+    sphere = fake_object(fake_mesh("sphere", 10, [3] * 16), hide_render=True)
+    point_cloud = fake_object(fake_mesh("points", 100, []), instance_type="VERTS", children=[sphere])
+    collection = mock.Mock()
+    collection.all_objects = [point_cloud, sphere]
+
+    footprint = collection_footprint(collection, depsgraph=None)
+    assert footprint.objects == 2
+    assert footprint.vertices == 100 * 10
+    assert footprint.triangles == 100 * 16
+
+
+def test_footprint_measures_shared_meshes_once():
+    shared_mesh = fake_mesh("bond", 66, [4] * 32 + [3] * 64)
+    bonds = [fake_object(shared_mesh) for _ in range(5)]
+    collection = mock.Mock()
+    collection.all_objects = bonds
+
+    footprint = collection_footprint(collection, depsgraph=None)
+    _, triangles, mesh_bytes = measure_mesh(shared_mesh)
+    assert footprint.triangles == 5 * triangles
+    assert footprint.mesh_bytes == mesh_bytes
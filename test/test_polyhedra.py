@@ -0,0 +1,80 @@
+"""
+Tests functionality related to coordination polyhedra
+"""
+import sys
+
+import numpy as np
+import pytest
+import ase.build
+import ase.neighborlist
+
+from fixtures import superconductor_123
+import config
+
+sys.path.append(config.project_root)
+
+from utils.polyhedra import CoordinationPolyhedra, convex_hulls
+
+OCTAHEDRON = np.array([[1, 0, 0], [-1, 0, 0], [0, 1, 0], [0, -1, 0], [0, 0, 1], [0, 0, -1]], dtype=float)
+
+
+def adjacency_matrix(atoms):
+    neighborlist = ase.neighborlist.NeighborList(cutoffs=ase.neighborlist.natural_cutoffs(atoms),
+                                                 self_interaction=False,
+                                                 primitive=ase.neighborlist.NewPrimitiveNeighborList)
+    neighborlist.update(atoms)
+    return neighborlist.get_connectivity_matrix(sparse=True)
+
+
+def enclosed_volume(vertices, faces):
+    corners = vertices[faces]
+    return np.einsum("ij,ij->i", corners[:, 0], np.cross(corners[:, 1], corners[:, 2])).sum() / 6
+
+
+def test_hull_of_octahedra():
+    shells = np.stack([OCTAHEDRON, 2 * OCTAHEDRON, OCTAHEDRON + [0, 0, 0.1]])
+    shell_index, faces = convex_hulls(shells)
+    np.testing.assert_array_equal(np.bincount(shell_index), [8, 8, 8])
+    for shell, scale in zip(range(3), (1, 8, 1)):
+        assert enclosed_volume(shells[shell], faces[shell_index == shell]) == pytest.approx(4 / 3 * scale)
+
+
+def test_hull_of_tetrahedron_faces_outwards():
+    tetrahedron = np.array([[1, 1, 1], [1, -1, -1], [-1, 1, -1], [-1, -1, 1]], dtype=float)
+    shell_index, faces = convex_hulls(tetrahedron[None])
+    assert len(faces) == 4
+    assert enclosed_volume(tetrahedron, faces) == pytest.approx(8 / 3)
+
+
+def test_superconductor_copper_polyhedra(superconductor_123):
+    polyhedra = CoordinationPolyhedra(["Cu"], ligand_elements=["O"])
+    centers, _ = polyhedra.shells(superconductor_123, adjacency_matrix(superconductor_123))
+    # Two CuO5 pyramids and one CuO4 square, with periodic images counted separately
+    assert sorted(np.bincount(centers)[np.unique(centers)]) == [4, 5, 5]
+
+    vertices, faces = polyhedra.polyhedra(superconductor_123, adjacency_matrix(superconductor_123))["Cu"]
+    assert len(vertices) == 14
+    assert len(faces) == 2 * 6 + 4
+    assert faces.min() == 0 and faces.max() == len(vertices) - 1
+
+
+def test_ligands_follow_adjacency(superconductor_123):
+    atoms = superconductor_123
+    empty = adjacency_matrix(atoms) * 0
+    assert CoordinationPolyhedra(["Cu"], ligand_elements=["O"]).polyhedra(atoms, empty) == {}
+
+
+def test_one_mesh_per_element():
+    crystal = ase.build.bulk("NaCl", "rocksalt", a=5.64, cubic=True).repeat(2)
+    polyhedra = CoordinationPolyhedra(["Na", "Cl"]).polyhedra(crystal, adjacency_matrix(crystal))
+    assert set(polyhedra) == {"Na", "Cl"}
+    for symbol, (vertices, faces) in polyhedra.items():
+        num_sites = crystal.get_chemical_symbols().count(symbol)
+        assert len(vertices) == 6 * num_sites
+        assert len(faces) == 8 * num_sites
+        assert enclosed_volume(vertices, faces) == pytest.approx(num_sites * 4 / 3 * (5.64 / 2) ** 3)
+
+
+def test_invalid_elements_raise():
+    with pytest.raises(ValueError):
+        CoordinationPolyhedra(["Xx"])
@@ -0,0 +1,72 @@
+"""
+Tests functionality related to the spatial index
+"""
+import sys
+
+import numpy as np
+import ase.geometry
+
+from fixtures import molecule_ethanol, mof_nmgc, superconductor_123, protein_1l2y
+import config
+
+sys.path.append(config.project_root)
+
+from utils.spatial import SpatialIndex
+
+
+def periodic_distances(atoms, point):
+    _, distances = ase.geometry.get_distances(point, atoms.positions, cell=atoms.cell, pbc=atoms.pbc)
+    return distances[0]
+
+
+def test_index_builds_lazily(molecule_ethanol):
+    index = SpatialIndex(molecule_ethanol.positions)
+    assert index._tree is None
+    index.within_radius(np.zeros(3), 1.0)
+    assert index._tree is not None
+
+
+def test_radius_query_nonperiodic(molecule_ethanol):
+    index = SpatialIndex(molecule_ethanol.positions)
+    center = molecule_ethanol.positions[0]
+    expected = np.flatnonzero(np.linalg.norm(molecule_ethanol.positions - center, axis=1) <= 1.5)
+    np.testing.assert_array_equal(index.within_radius(center, 1.5), expected)
+
+
+def test_radius_query_periodic(superconductor_123):
+    index = SpatialIndex(superconductor_123.positions, superconductor_123.cell, superconductor_123.pbc)
+    center = superconductor_123.positions[0]
+    expected = np.flatnonzero(periodic_distances(superconductor_123, center) <= 3.0)
+    np.testing.assert_array_equal(index.within_radius(center, 3.0), expected)
+
+
+def test_radius_query_grows_padding(superconductor_123):
+    index = SpatialIndex(superconductor_123.positions, superconductor_123.cell, superconductor_123.pbc,
+                         padding=1.0)
+    found = index.within_radius(np.zeros(3), 6.0)
+    expected = np.flatnonzero(periodic_distances(superconductor_123, np.zeros(3)) <= 6.0)
+    np.testing.assert_array_equal(found, expected)
+
+
+def test_nearest_query_periodic(mof_nmgc):
+    index = SpatialIndex(mof_nmgc.positions, mof_nmgc.cell, mof_nmgc.pbc)
+    point = mof_nmgc.cell.cartesian_positions([0.99, 0.01, 0.5])
+    distances, indices = index.nearest(point, k=3)
+    expected = np.sort(periodic_distances(mof_nmgc, point))[:3]
+    np.testing.assert_allclose(distances[0], expected)
+
+
+def test_box_query(molecule_ethanol):
+    index = SpatialIndex(molecule_ethanol.positions)
+    lower, upper = np.full(3, -1.0), np.full(3, 1.0)
+    inside = np.all(np.abs(molecule_ethanol.positions) <= 1.0, axis=1)
+    np.testing.assert_array_equal(index.within_box(lower, upper), np.flatnonzero(inside))
+
+
+def test_placeholder_cell_is_not_periodic(protein_1l2y):
+    index = SpatialIndex(protein_1l2y.positions, protein_1l2y.cell, protein_1l2y.pbc)
+    assert not index.is_periodic
+    point = protein_1l2y.positions[0]
+    expected = np.flatnonzero(np.linalg.norm(protein_1l2y.positions - point, axis=1) <= 5.0)
+    np.testing.assert_array_equal(index.within_radius(point, 5.0), expected)
+    assert len(index._tree.data) == len(protein_1l2y)
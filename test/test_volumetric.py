@@ -0,0 +1,204 @@
+"""
+Tests functionality related to volumetric data and isosurfaces
+"""
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+import ase
+import ase.io
+import ase.units
+
+import config
+
+sys.path.append(config.project_root)
+
+from utils.volumetric import VolumetricGrid, evict_cache
+
+GRID_SHAPE = (20, 24, 28)
+BLOB_WIDTH = 1.5
+
+
+def gaussian_blob(points, center):
+    squared = np.sum((points - center) ** 2, axis=-1)
+    return np.exp(-squared / (2 * BLOB_WIDTH ** 2))
+
+
+def grid_points(origin, axes, shape):
+    indices = np.stack(np.meshgrid(*[np.arange(size) for size in shape], indexing="ij"), axis=-1)
+    return origin + indices @ axes
+
+
+@pytest.fixture
+def cube_file(tmp_path):
+    origin = np.array([-5.0, -6.0, -7.0])
+    axes = np.diag([0.5, 0.5, 0.5])
+    values = gaussian_blob(grid_points(origin, axes, GRID_SHAPE), center=np.zeros(3))
+
+    bohr_origin, bohr_axes = origin / ase.units.Bohr, axes / ase.units.Bohr
+    lines = ["Test cube", "Gaussian blob", f"2 {bohr_origin[0]} {bohr_origin[1]} {bohr_origin[2]}"]
+    lines += [f"{size} {step[0]} {step[1]} {step[2]}" for size, step in zip(GRID_SHAPE, bohr_axes)]
+    lines += ["1 1.0 0.0 0.0 0.7", "1 1.0 0.0 0.0 -0.7"]
+    flat = values.reshape(-1)
+    lines += [" ".join(f"{value:.6e}" for value in flat[i:i + 6]) for i in range(0, len(flat), 6)]
+    path = tmp_path / "blob.cube"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def chgcar_file(tmp_path):
+    atoms = ase.Atoms("H2", positions=[[5, 5, 4.6], [5, 5, 5.4]], cell=[10, 11, 12], pbc=True)
+    axes = atoms.cell.array / np.array(GRID_SHAPE)[:, None]
+    density = gaussian_blob(grid_points(np.zeros(3), axes, GRID_SHAPE), center=np.array([5, 5, 5]))
+
+    structure = io.StringIO()
+    ase.io.write(structure, atoms, format="vasp")
+    flat = (density * atoms.get_volume()).reshape(-1, order="F")
+    lines = [structure.getvalue().rstrip("\n"), "", " ".join(map(str, GRID_SHAPE))]
+    lines += [" ".join(f"{value:.8e}" for value in flat[i:i + 5]) for i in range(0, len(flat), 5)]
+    # VASP follows each grid with the augmentation occupancies of every atom
+    for atom in range(len(atoms)):
+        lines += [f"augmentation occupancies   {atom + 1}  4", " 0.1234567E+00 -0.2345678E-01 0.0 0.0", ""]
+    path = tmp_path / "CHGCAR"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_read_cube(cube_file, tmp_path):
+    grid = VolumetricGrid.from_file(cube_file, cache_directory=str(tmp_path / "cache"))
+    assert grid.shape == GRID_SHAPE
+    assert isinstance(grid.data, np.memmap)
+    assert len(grid.atoms) == 2
+    assert not grid.periodic and not grid.atoms.pbc.any()
+    np.testing.assert_allclose(grid.origin, [-5, -6, -7], atol=1e-6)
+    np.testing.assert_allclose(grid.axes, np.diag([0.5, 0.5, 0.5]), atol=1e-6)
+    expected = gaussian_blob(grid_points(grid.origin, grid.axes, GRID_SHAPE), center=np.zeros(3))
+    np.testing.assert_allclose(grid.data, expected, atol=1e-6)
+
+
+def test_read_chgcar(chgcar_file, tmp_path):
+    grid = VolumetricGrid.from_file(chgcar_file, cache_directory=str(tmp_path / "cache"))
+    assert grid.shape == GRID_SHAPE
+    assert grid.periodic and grid.atoms.pbc.all()
+    assert grid.atoms.get_chemical_formula() == "H2"
+    expected = gaussian_blob(grid_points(np.zeros(3), grid.axes, GRID_SHAPE), center=np.array([5, 5, 5]))
+    np.testing.assert_allclose(grid.data, expected, atol=1e-6)
+
+
+def test_grid_is_cached(cube_file, tmp_path):
+    cache_directory = str(tmp_path / "cache")
+    first = VolumetricGrid.from_file(cube_file, cache_directory=cache_directory)
+    assert len(os.listdir(cache_directory)) == 1
+    second = VolumetricGrid.from_file(cube_file, cache_directory=cache_directory)
+    assert len(os.listdir(cache_directory)) == 1
+    np.testing.assert_array_equal(first.data, second.data)
+
+
+def test_truncated_grid_leaves_no_cache(cube_file, tmp_path):
+    with open(cube_file) as file:
+        lines = file.readlines()
+    truncated = tmp_path / "truncated.cube"
+    truncated.write_text("".join(lines[:len(lines) // 2]))
+    cache_directory = tmp_path / "cache"
+    with pytest.raises(ValueError):
+        VolumetricGrid.from_file(str(truncated), cache_directory=str(cache_directory))
+    assert os.listdir(cache_directory) == []
+
+
+def test_garbled_grid_raises(cube_file, tmp_path):
+    with open(cube_file) as file:
+        lines = file.readlines()
+    lines[len(lines) // 2] = "1.0 oops 2.0\n"
+    garbled = tmp_path / "garbled.cube"
+    garbled.write_text("".join(lines))
+    cache_directory = tmp_path / "cache"
+    with pytest.raises(ValueError):
+        VolumetricGrid.from_file(str(garbled), cache_directory=str(cache_directory))
+    assert os.listdir(cache_directory) == []
+
+
+@pytest.fixture
+def orbital_cube_file(tmp_path):
+    # Two orbitals, stored as interleaved values at each grid point
+    shape = (2, 3, 4)
+    first = np.arange(np.prod(shape), dtype=float).reshape(shape)
+    lines = ["Test cube", "Two orbitals", "-1 0.0 0.0 0.0"]
+    lines += [f"{size} 1.0 0.0 0.0" if axis == 0 else f"{size} 0.0 {float(axis == 1)} {float(axis == 2)}"
+              for axis, size in enumerate(shape)]
+    lines += ["8 8.0 0.0 0.0 0.0", "2 11 12"]
+    values = np.stack([first, -first], axis=-1).reshape(-1)
+    lines += [" ".join(f"{value:.6e}" for value in values[i:i + 6]) for i in range(0, len(values), 6)]
+    path = tmp_path / "orbitals.cube"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path), first
+
+
+def test_read_orbital_cube(orbital_cube_file, tmp_path):
+    path, first = orbital_cube_file
+    cache_directory = str(tmp_path / "cache")
+    np.testing.assert_allclose(VolumetricGrid.from_file(path, cache_directory).data, first)
+    np.testing.assert_allclose(VolumetricGrid.from_file(path, cache_directory, orbital=1).data, -first)
+    with pytest.raises(ValueError):
+        VolumetricGrid.from_file(path, cache_directory, orbital=2)
+
+
+def test_cache_eviction(tmp_path):
+    cache_directory = tmp_path / "cache"
+    cache_directory.mkdir()
+    for age, name in enumerate(["newest", "middle", "oldest"]):
+        path = cache_directory / f"{name}.npy"
+        path.write_bytes(bytes(100))
+        os.utime(path, (time.time() - age * 10, time.time() - age * 10))
+    (cache_directory / "stale.npy.1.partial").write_bytes(bytes(10))
+    os.utime(cache_directory / "stale.npy.1.partial", (0, 0))
+
+    evict_cache(str(cache_directory), max_age=1000, max_bytes=250)
+    assert sorted(os.listdir(cache_directory)) == ["middle.npy", "newest.npy"]
+    evict_cache(str(cache_directory), max_age=5, max_bytes=250)
+    assert os.listdir(cache_directory) == ["newest.npy"]
+    evict_cache(str(cache_directory), max_bytes=0, keep=str(cache_directory / "newest.npy"))
+    assert os.listdir(cache_directory) == ["newest.npy"]
+
+
+def test_unknown_format_raises(tmp_path):
+    path = tmp_path / "structure.xyz"
+    path.write_text("")
+    with pytest.raises(ValueError):
+        VolumetricGrid.from_file(str(path), cache_directory=str(tmp_path / "cache"))
+
+
+@pytest.mark.parametrize("step", [1, 2])
+def test_isosurface_is_closed_sphere(cube_file, tmp_path, step):
+    grid = VolumetricGrid.from_file(cube_file, cache_directory=str(tmp_path / "cache"))
+    level = 0.5
+    vertices, faces = grid.isosurface(level, step=step)
+    assert len(faces) > 0
+
+    # Vertices lie on the sphere where the blob crosses the isovalue
+    radius = BLOB_WIDTH * np.sqrt(-2 * np.log(level))
+    tolerance = 0.1 * step
+    np.testing.assert_allclose(np.linalg.norm(vertices, axis=1), radius, atol=tolerance)
+
+    # Every edge is shared by exactly two triangles, in opposite directions
+    directed = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    assert len(np.unique(directed, axis=0)) == len(directed)
+    assert len(np.unique(np.sort(directed, axis=1), axis=0)) * 2 == len(directed)
+
+    # Normals point outwards, so the enclosed volume is positive and close to the sphere's
+    corners = vertices[faces]
+    volume = np.einsum("ij,ij->i", corners[:, 0], np.cross(corners[:, 1], corners[:, 2])).sum() / 6
+    assert volume == pytest.approx(4 / 3 * np.pi * radius ** 3, rel=0.15)
+
+
+def test_periodic_isosurface_wraps(chgcar_file, tmp_path):
+    grid = VolumetricGrid.from_file(chgcar_file, cache_directory=str(tmp_path / "cache"))
+    grid.origin = grid.origin - 5
+    grid.data = np.roll(np.asarray(grid.data), shift=[size // 2 for size in GRID_SHAPE], axis=(0, 1, 2))
+    vertices, faces = grid.isosurface(0.5)
+    assert len(faces) > 0
+    assert np.any(vertices < 0)
+    assert np.any(vertices > 0)
@@ -0,0 +1,124 @@
+"""
+Filters that trim a structure down right after it's read, before bonds are calculated or anything is drawn.
+"""
+from __future__ import annotations
+from numbers import Real
+from typing import Sequence, Tuple
+
+import numpy as np
+import ase
+import ase.data
+
+
+class AtomFilter:
+    """
+    A set of criteria an atom must meet to be kept. Every criterion is evaluated as one array operation over
+    the whole structure, and the structure is only sliced once, after all of them have been combined.
+
+    Attributes:
+        include_elements (Tuple[str]): If not empty, only atoms of these elements are kept.
+        exclude_elements (Tuple[str]): Atoms of these elements are removed.
+        strip_hydrogens (bool): Whether hydrogen atoms are removed.
+        box (Tuple[np.ndarray, np.ndarray]): Lower and upper corners of an axis-aligned box atoms must be in.
+        sphere (Tuple[np.ndarray, Real]): Center and radius of a sphere atoms must be in.
+        indices (np.ndarray): If not None, only the atoms with these indices are kept.
+    """
+
+    def __init__(self,
+                 include_elements: Sequence[str] = (),
+                 exclude_elements: Sequence[str] = (),
+                 strip_hydrogens: bool = False,
+                 box: Tuple[Sequence[Real], Sequence[Real]] = None,
+                 sphere: Tuple[Sequence[Real], Real] = None,
+                 indices: Sequence[int] = None):
+        """
+        Init for the atom filter. By default, no atoms are removed.
+
+        Args:
+            include_elements (Sequence[str], optional): Chemical symbols of the only elements to keep.
+            exclude_elements (Sequence[str], optional): Chemical symbols of elements to remove.
+            strip_hydrogens (bool, optional): Whether to remove hydrogen atoms. Defaults to False.
+            box (Tuple[Sequence[Real], Sequence[Real]], optional): Lower and upper corners of a box to crop to.
+            sphere (Tuple[Sequence[Real], Real], optional): Center and radius of a sphere to crop to.
+            indices (Sequence[int], optional): Indices of the only atoms to keep, as numbered in the file.
+
+        Raises:
+            ValueError: If one of the chemical symbols isn't an element.
+        """
+        for symbol in (*include_elements, *exclude_elements):
+            if symbol not in ase.data.atomic_numbers:
+                raise ValueError(f"'{symbol}' is not a chemical symbol")
+        self.include_elements = tuple(include_elements)
+        self.exclude_elements = tuple(exclude_elements)
+        self.strip_hydrogens = strip_hydrogens
+        self.box = None if box is None else (np.asarray(box[0], dtype=float), np.asarray(box[1], dtype=float))
+        self.sphere = None if sphere is None else (np.asarray(sphere[0], dtype=float), float(sphere[1]))
+        self.indices = None if indices is None else np.asarray(indices, dtype=int)
+
+    def __repr__(self):
+        return f"AtomFilter on {', '.join(self.criteria) or 'nothing'}"
+
+    @property
+    def criteria(self) -> Tuple[str]:
+        """Names of the criteria that are in use."""
+        in_use = {
+            "include_elements": bool(self.include_elements),
+            "exclude_elements": bool(self.exclude_elements),
+            "strip_hydrogens": self.strip_hydrogens,
+            "box": self.box is not None,
+            "sphere": self.sphere is not None,
+            "indices": self.indices is not None,
+        }
+        return tuple(name for name, is_used in in_use.items() if is_used)
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether the filter keeps every atom."""
+        return not self.criteria
+
+    def mask(self, atoms: ase.Atoms) -> np.ndarray:
+        """Evaluates the filter on a structure.
+
+        Args:
+            atoms (ase.Atoms): Structure to evaluate the filter on.
+
+        Returns:
+            np.ndarray: Boolean array, True for each atom that should be kept.
+        """
+        keep = np.ones(len(atoms), dtype=bool)
+        numbers = atoms.numbers
+        positions = atoms.positions
+
+        if self.include_elements:
+            keep &= np.isin(numbers, [ase.data.atomic_numbers[symbol] for symbol in self.include_elements])
+        if self.exclude_elements:
+            keep &= ~np.isin(numbers, [ase.data.atomic_numbers[symbol] for symbol in self.exclude_elements])
+        if self.strip_hydrogens:
+            keep &= numbers != ase.data.atomic_numbers["H"]
+        if self.box is not None:
+            lower, upper = self.box
+            keep &= np.all((positions >= lower) & (positions <= upper), axis=1)
+        if self.sphere is not None:
+            center, radius = self.sphere
+            keep &= np.einsum("ij,ij->i", positions - center, positions - center) <= radius ** 2
+        if self.indices is not None:
+            in_indices = np.zeros(len(atoms), dtype=bool)
+            in_indices[self.indices[(self.indices >= 0) & (self.indices < len(atoms))]] = True
+            keep &= in_indices
+        return keep
+
+    def apply(self, atoms: ase.Atoms) -> ase.Atoms:
+        """Removes the atoms that don't pass the filter.
+
+        Args:
+            atoms (ase.Atoms): Structure to filter.
+
+        Returns:
+            ase.Atoms: The atoms that passed the filter, or the original structure if all of them did.
+        """
+        if self.is_empty:
+            return atoms
+        keep = self.mask(atoms)
+        if keep.all():
+            return atoms
+        return atoms[keep]
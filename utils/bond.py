@@ -2,8 +2,11 @@
 Bond class, manages the connections between atoms in a system, and how they're drawn.
 """
 from __future__ import annotations
-from typing import List, TYPE_CHECKING
+import copy
+from numbers import Real
+from typing import List, Tuple, TYPE_CHECKING
 
+import numpy as np
 import scipy
 import ase
 import ase.neighborlist
@@ -11,7 +14,7 @@ import ase.data
 
 if TYPE_CHECKING:
     from chemical import Chemical
-from utils.bond_styles import BondStyle, FrustumBond
+from utils.bond_styles import BondStyle, FrustumBond, remove_bond_object
 
 
 class BondBag:
@@ -21,14 +24,19 @@ class BondBag:
     """
 
     def __init__(self, chemical: Chemical,
-                 bond_style: BondStyle = None):
+                 bond_style: BondStyle = None,
+                 skin: Real = 0.5):
         """
         Init for the bonds object.
 
         Args:
             chemical ([Chemical]): Chemical species, same as the Chemical class defined in this addon.
+            bond_style (BondStyle, optional): Style used to draw bonds. Defaults to FrustumBond.
+            skin (Real, optional): Skin distance of the Verlet list used when atoms move. Defaults to 0.5.
         """
         self._chemical: Chemical = chemical
+        self._skin = skin
+        self._verlet_list = None
 
         if bond_style is None:
             self._bond_style = FrustumBond()
@@ -37,6 +45,7 @@ class BondBag:
 
         self._adjacency_matrix = None
         self._bonds: List[Bond] = []
+        self._pairs = np.zeros((0, 2), dtype=int)
         self._has_calculated_bonds = False
 
         self.neighborlist = ase.neighborlist.NeighborList(cutoffs=ase.neighborlist.natural_cutoffs(chemical.atoms),
@@ -63,7 +72,8 @@ class BondBag:
 
     @bond_style.setter
     def bond_style(self, new_syle: BondStyle):
-        """Setter method for the bond style
+        """Setter method for the bond style. Bonds that have already been drawn with a style
+        that differs from the new one have their geometry updated in place.
 
         Args:
             new_syle (BondStyle): New bond style to use for all bonds in the bagg
@@ -72,6 +82,10 @@ class BondBag:
         if self._has_calculated_bonds:
             for bond in self._bonds:
                 bond.bond_style = new_syle
+            stale_bonds = [bond for bond in self._bonds
+                           if bond.blender_object is not None and bond.drawn_style != new_syle]
+            if stale_bonds:
+                new_syle.restyle_bonds(stale_bonds)
 
     @property
     def bonds(self) -> List[Bond]:
@@ -82,6 +96,7 @@ class BondBag:
         """
         if not self._has_calculated_bonds:
             index_x, index_y, _ = scipy.sparse.find(self.adjacency_matrix)
+            self._pairs = np.stack([index_x, index_y], axis=1)
             self._bonds = [
                 Bond(self._chemical.atoms[x], self._chemical.atoms[y], self._bond_style) for x, y in
                 zip(index_x, index_y)
@@ -89,6 +104,75 @@ class BondBag:
             self._has_calculated_bonds = True
         return self._bonds
 
+    @property
+    def pairs(self) -> np.ndarray:
+        """Getter method for the indices of the atoms joined by each bond. There is no setter method.
+
+        Returns:
+            np.ndarray: (N, 2) array, where row i holds the atom indices of the i-th bond in the bag.
+        """
+        self.bonds  # Calculates the pairs, if they haven't been already
+        return self._pairs
+
+    def incident_bonds(self, atom_indices: np.ndarray) -> List[Bond]:
+        """Finds the bonds that touch any of the given atoms.
+
+        Args:
+            atom_indices (np.ndarray): Indices of atoms in the chemical.
+
+        Returns:
+            List[Bond]: Bonds with at least one end on one of the atoms.
+        """
+        is_incident = np.isin(self.pairs, atom_indices).any(axis=1)
+        return [self._bonds[index] for index in np.flatnonzero(is_incident)]
+
+    def update_topology(self, offset=None) -> Tuple[List[Bond], List[Bond]]:
+        """Re-evaluates which atoms are bonded after the chemical's atoms have moved, such as when stepping
+        through a trajectory. Candidate pairs come from a Verlet list, so a full neighbor search only happens
+        once some atom has moved more than half the skin distance since the last one.
+        Bonds that broke have their objects removed, bonds that persist are moved, and bonds that formed are
+        drawn if an offset is given.
+
+        Args:
+            offset (Tuple[Real, Real, Real], optional): Offset to draw new bonds with. If None, they aren't drawn.
+
+        Returns:
+            Tuple[List[Bond], List[Bond]]: The bonds that formed, and the bonds that broke.
+        """
+        atoms = self._chemical.atoms
+        if self._verlet_list is None:
+            self._verlet_list = VerletBondList(atoms, skin=self._skin)
+        new_pairs = self._verlet_list.bonded_pairs(atoms)
+
+        # Pairs are compared through a single integer key per pair. ASE doesn't always put the lower index first.
+        old_pairs = np.sort(self.pairs, axis=1)
+        old_keys = old_pairs[:, 0] * len(atoms) + old_pairs[:, 1]
+        new_keys = new_pairs[:, 0] * len(atoms) + new_pairs[:, 1]
+        is_kept = np.isin(old_keys, new_keys)
+        is_formed = ~np.isin(new_keys, old_keys)
+
+        broken = [self._bonds[index] for index in np.flatnonzero(~is_kept)]
+        kept = [self._bonds[index] for index in np.flatnonzero(is_kept)]
+        formed = [Bond(atoms[x], atoms[y], self._bond_style) for x, y in new_pairs[is_formed]]
+
+        for bond in broken:
+            if bond.blender_object is not None:
+                remove_bond_object(bond.blender_object)
+                bond.blender_object = None
+        drawn = [bond for bond in kept if bond.blender_object is not None]
+        if drawn:
+            self._bond_style.move_bonds(drawn)
+        if offset is not None:
+            for bond in formed:
+                bond.draw(offset)
+
+        self._bonds = kept + formed
+        self._pairs = np.concatenate([self._pairs[is_kept], new_pairs[is_formed]])
+        self._adjacency_matrix = scipy.sparse.coo_matrix((np.ones(len(self._pairs), dtype=int),
+                                                          (self._pairs[:, 0], self._pairs[:, 1])),
+                                                         shape=(len(atoms), len(atoms))).todok()
+        return formed, broken
+
     @property
     def adjacency_matrix(self) -> scipy.sparse.dok.dok_matrix:
         """Calculates the adjacency matrix for the given chemical structure.
@@ -116,8 +200,109 @@ class Bond:
         self.destination_atom = destination_atom
         self.bond_style = bond_style
 
+        # Filled in once the bond is drawn, so the geometry can be restyled later on
+        self.blender_object = None
+        self.drawn_style = None
+        self.offset = (0, 0, 0)
+
     def draw(self, offset=(0, 0, 0)) -> Bond:
-        self.bond_style.spawn_bond_from_atoms(atom_start=self.source_atom,
-                                              atom_end=self.destination_atom,
-                                              offset=offset)
+        self.blender_object = self.bond_style.spawn_bond_from_atoms(atom_start=self.source_atom,
+                                                                    atom_end=self.destination_atom,
+                                                                    offset=offset)
+        self.drawn_style = copy.copy(self.bond_style)
+        self.offset = offset
         return self
+
+    @property
+    def length(self) -> float:
+        """Current distance between the two atoms, in Angstrom."""
+        return float(np.linalg.norm(self.destination_atom.position - self.source_atom.position))
+
+
+class VerletBondList:
+    """
+    Tracks which atoms are bonded as they move, using a Verlet list. Pairs within their bonding cutoff
+    plus a skin distance are kept as candidates, so each update only needs to measure the candidates.
+    The candidates are rebuilt once any atom has moved more than half the skin since they were found,
+    as only then could a pair that wasn't a candidate have come within bonding distance.
+
+    Attributes:
+        cutoffs (np.ndarray): Bonding radius of each atom, from ASE's natural cutoffs.
+        tolerance (Real): Two atoms are bonded if they're closer than the sum of their radii plus this.
+        skin (Real): Extra distance added to the cutoffs when looking for candidates.
+        num_rebuilds (int): How many times the candidates have been rebuilt.
+    """
+
+    def __init__(self, atoms: ase.Atoms, skin: Real = 0.5, tolerance: Real = 0.6):
+        """
+        Init for the Verlet list. The candidates are found on the first update.
+
+        Args:
+            atoms (ase.Atoms): Structure whose bonds will be tracked.
+            skin (Real, optional): Extra distance added to the cutoffs when looking for candidates.
+            tolerance (Real, optional): Slack on the sum of the radii of bonded atoms. ASE's NeighborList adds
+                                        its skin (0.3 by default) to each atom's cutoff, so the default of twice
+                                        that makes the bonds agree with BondBag's.
+        """
+        self.cutoffs = np.array(ase.neighborlist.natural_cutoffs(atoms))
+        self.tolerance = tolerance
+        self.skin = skin
+        self.num_rebuilds = 0
+
+        self._reference_positions = None
+        self._candidates = np.zeros((0, 2), dtype=int)
+        self._candidate_shifts = np.zeros((0, 3), dtype=int)
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    def __repr__(self):
+        return f"VerletBondList with {len(self)} candidate pairs"
+
+    def needs_rebuild(self, positions: np.ndarray) -> bool:
+        """Checks whether any atom has moved more than half the skin since the candidates were found.
+
+        Args:
+            positions (np.ndarray): (N, 3) array of current positions.
+
+        Returns:
+            bool: True if the candidates have to be rebuilt.
+        """
+        if self._reference_positions is None or len(positions) != len(self._reference_positions):
+            return True
+        displacements = positions - self._reference_positions
+        max_displacement = np.sqrt(np.einsum("ij,ij->i", displacements, displacements).max(initial=0))
+        return max_displacement > self.skin / 2
+
+    def bonded_pairs(self, atoms: ase.Atoms) -> np.ndarray:
+        """Finds the pairs of atoms that are currently bonded.
+
+        Args:
+            atoms (ase.Atoms): The structure at its current positions.
+
+        Returns:
+            np.ndarray: (M, 2) array of atom indices, with the lower index of each pair first.
+        """
+        positions = atoms.get_positions()
+        if self.needs_rebuild(positions):
+            self.__rebuild(atoms)
+
+        first, second = self._candidates[:, 0], self._candidates[:, 1]
+        separations = positions[second] - positions[first] + self._candidate_shifts @ atoms.cell.array
+        distances = np.sqrt(np.einsum("ij,ij->i", separations, separations))
+        is_bonded = distances < self.cutoffs[first] + self.cutoffs[second] + self.tolerance
+        return np.unique(self._candidates[is_bonded], axis=0).reshape(-1, 2)
+
+    def __rebuild(self, atoms: ase.Atoms) -> None:
+        """Finds every pair of atoms within their bonding cutoff plus the skin.
+
+        Args:
+            atoms (ase.Atoms): The structure at its current positions.
+        """
+        radii = self.cutoffs + (self.tolerance + self.skin) / 2
+        first, second, shifts = ase.neighborlist.neighbor_list("ijS", atoms, radii, self_interaction=False)
+        is_half = first <= second
+        self._candidates = np.stack([first[is_half], second[is_half]], axis=1)
+        self._candidate_shifts = shifts[is_half]
+        self._reference_positions = atoms.get_positions()
+        self.num_rebuilds += 1
@@ -2,8 +2,10 @@
 This is where the main interface with blender should be for bond drawing.
 """
 
+from __future__ import annotations
+import copy
 from numbers import Real
-from typing import Tuple
+from typing import List, Tuple, TYPE_CHECKING
 from abc import ABC, abstractmethod
 
 import numpy as np
@@ -12,6 +14,14 @@ import ase.data
 import bpy
 import mathutils
 from utils import PACKAGE_PREFIX
+from utils.mesh_buffers import fill_mesh, set_vertex_positions
+
+if TYPE_CHECKING:
+    from utils.bond import Bond
+
+
+# Custom property recording the length a bond's mesh was drawn at
+DRAWN_LENGTH_KEY = f"{PACKAGE_PREFIX}_drawn_length"
 
 
 class BondStyle(ABC):
@@ -39,6 +49,36 @@ class BondStyle(ABC):
         """
         return None
 
+    def restyle_bonds(self, bonds: List[Bond]) -> List[Bond]:
+        """Redraws bonds that were drawn with a different style, so they match this one.
+        Styles that can rewrite their geometry in place should override this; the fallback
+        removes the old object and spawns a new one.
+
+        Args:
+            bonds (List[Bond]): Bonds that have already been drawn.
+
+        Returns:
+            List[Bond]: The bonds that were restyled.
+        """
+        for bond in bonds:
+            remove_bond_object(bond.blender_object)
+            bond.blender_object = None
+            bond.draw(bond.offset)
+        return bonds
+
+    def move_bonds(self, bonds: List[Bond]) -> List[Bond]:
+        """Updates already-drawn bonds after their atoms have moved, such as between frames of a trajectory.
+        Styles that can do this by transforming the existing objects should override this; the fallback
+        redraws the bonds.
+
+        Args:
+            bonds (List[Bond]): Bonds that have already been drawn with this style.
+
+        Returns:
+            List[Bond]: The bonds that were moved.
+        """
+        return BondStyle.restyle_bonds(self, bonds)
+
 
 class FrustumBond(BondStyle):
     """Depicts bonds as a frustrum. The radius of the start and end caps are calculated by
@@ -56,6 +96,14 @@ class FrustumBond(BondStyle):
         self.scale_factor = scale_factor
         self.num_vertices = num_vertices
 
+    def __eq__(self, other) -> bool:
+        return (type(self) is type(other)
+                and self.scale_factor == other.scale_factor
+                and self.num_vertices == other.num_vertices)
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.scale_factor, self.num_vertices))
+
     def spawn_bond_from_atoms(self,
                               atom_start: ase.Atom,
                               atom_end: ase.Atom,
@@ -75,36 +123,110 @@ class FrustumBond(BondStyle):
         """
         depth = np.abs(np.linalg.norm(atom_start.position - atom_end.position))
 
-        # The origin of the spawned conic is at the midpoint of the two caps
-        location = ((atom_start.position + atom_end.position) / 2) + offset
-
         # Bond scales
         start_radius = ase.data.covalent_radii[atom_start.number] * self.scale_factor
         end_radius = ase.data.covalent_radii[atom_end.number] * self.scale_factor
 
-        quaternion = self.calculate_track_quaternion(atom_start.position, atom_end.position)
-        bpy.ops.mesh.primitive_cone_add(vertices=self.num_vertices,
-                                        radius1=start_radius,
-                                        radius2=end_radius,
-                                        depth=depth,
-                                        end_fill_type="TRIFAN",
-                                        location=location)
-
-        # Fix rotation
-        bpy.context.object.rotation_mode = "QUATERNION"
-        bpy.context.object.rotation_quaternion = quaternion
-
-        # Shade smooth
-        for poly in bpy.context.object.data.polygons:
-            poly.use_smooth = True
+        name = f"bond_{atom_start.symbol}-{atom_end.symbol}_frustum"
+        vertices = frustum_vertices(start_radius, end_radius, depth, self.num_vertices)[0]
+        faces, face_sizes = frustum_faces(self.num_vertices)
+        mesh = fill_mesh(bpy.data.meshes.new(name), vertices, faces, face_sizes, smooth=True)
 
-        # Rename object
-        bpy.context.object.name = f"bond_{atom_start.symbol}-{atom_end.symbol}_frustum"
+        # The origin of the spawned conic is at the midpoint of the two caps
+        bond_object = bpy.data.objects.new(name, mesh)
+        bond_object[DRAWN_LENGTH_KEY] = float(depth)
+        self.place_bond_object(bond_object, atom_start.position, atom_end.position, offset)
+        bpy.context.view_layer.active_layer_collection.collection.objects.link(bond_object)
 
         # Set material
         glass_shader = generic_glass()
-        bpy.context.object.active_material = glass_shader
-        return bpy.context.object
+        bond_object.active_material = glass_shader
+        return bond_object
+
+    def restyle_bonds(self, bonds: List[Bond]) -> List[Bond]:
+        """Rewrites the meshes of already-drawn bonds in place. The frustum of every bond is calculated
+        in one vectorized pass. If the number of vertices per cap is unchanged, only the vertex coordinates
+        are overwritten; otherwise the mesh's topology is rebuilt.
+
+        Args:
+            bonds (List[Bond]): Bonds that have already been drawn.
+
+        Returns:
+            List[Bond]: The bonds that were restyled.
+        """
+        if not bonds:
+            return bonds
+        start_positions = np.array([bond.source_atom.position for bond in bonds])
+        end_positions = np.array([bond.destination_atom.position for bond in bonds])
+        start_numbers = np.array([bond.source_atom.number for bond in bonds])
+        end_numbers = np.array([bond.destination_atom.number for bond in bonds])
+
+        all_vertices = frustum_vertices(ase.data.covalent_radii[start_numbers] * self.scale_factor,
+                                        ase.data.covalent_radii[end_numbers] * self.scale_factor,
+                                        np.linalg.norm(end_positions - start_positions, axis=1),
+                                        self.num_vertices)
+        faces, face_sizes = frustum_faces(self.num_vertices)
+
+        for bond, vertices, start_position, end_position in zip(bonds, all_vertices, start_positions, end_positions):
+            bond_object = bond.blender_object
+            mesh = bond_object.data
+            if mesh.users > 1 or isinstance(bond.drawn_style, InstancedFrustumBond):
+                # The bond was drawn as an instance of a shared prototype; give it a mesh of its own
+                old_mesh = mesh
+                mesh = bond_object.data = fill_mesh(bpy.data.meshes.new(bond_object.name), vertices,
+                                                    faces, face_sizes, smooth=True)
+                if old_mesh.users == 0:
+                    # That was the prototype's last instance
+                    bpy.data.meshes.remove(old_mesh)
+                bond_object.active_material = generic_glass()
+            elif len(mesh.vertices) == len(vertices):
+                set_vertex_positions(mesh, vertices)
+            else:
+                fill_mesh(mesh, vertices, faces, face_sizes, smooth=True)
+            self.place_bond_object(bond_object, start_position, end_position, bond.offset)
+            bond_object[DRAWN_LENGTH_KEY] = bond.length
+            bond.drawn_style = copy.copy(self)
+        return bonds
+
+    def move_bonds(self, bonds: List[Bond]) -> List[Bond]:
+        """Moves already-drawn bonds after their atoms have moved, without touching their meshes.
+        The change in length is taken up by stretching each object along its axis, relative to the length
+        its mesh was drawn at.
+
+        Args:
+            bonds (List[Bond]): Bonds that have already been drawn with this style.
+
+        Returns:
+            List[Bond]: The bonds that were moved.
+        """
+        for bond in bonds:
+            bond_object = self.place_bond_object(bond.blender_object, bond.source_atom.position,
+                                                 bond.destination_atom.position, bond.offset)
+            drawn_length = bond_object.get(DRAWN_LENGTH_KEY)
+            if drawn_length:
+                bond_object.scale = (1, 1, bond.length / drawn_length)
+        return bonds
+
+    def place_bond_object(self, bond_object: bpy.types.Object,
+                          start_position: np.ndarray,
+                          end_position: np.ndarray,
+                          offset: Tuple[Real, Real, Real] = (0, 0, 0)) -> bpy.types.Object:
+        """Moves a bond's object so its mesh, drawn along Z, spans the two given positions.
+
+        Args:
+            bond_object (bpy.types.Object): Object representing the bond.
+            start_position (np.ndarray): Position of the atom at the start of the bond.
+            end_position (np.ndarray): Position of the atom at the end of the bond.
+            offset (Tuple[Real, Real, Real]): Vector of length 3, which gets added to each atomic position
+
+        Returns:
+            bpy.types.Object: The object that was moved.
+        """
+        bond_object.location = ((start_position + end_position) / 2) + offset
+        bond_object.rotation_mode = "QUATERNION"
+        bond_object.rotation_quaternion = self.calculate_track_quaternion(start_position, end_position)
+        bond_object.scale = (1, 1, 1)
+        return bond_object
 
     @staticmethod
     def calculate_track_quaternion(start_position, end_position):
@@ -114,6 +236,182 @@ class FrustumBond(BondStyle):
         return quaternion
 
 
+class InstancedFrustumBond(FrustumBond):
+    """Depicts bonds as frustums, like FrustumBond, but every bond between the same pair of elements is a
+    linked duplicate of one shared, unit-length frustum mesh. Each bond's object only carries the transform
+    that stretches the prototype between its two atoms, so mesh memory scales with the number of element
+    pairs rather than with the number of bonds.
+
+    Attributes:
+        scale_factor (Real): Multiplier describing the bond's radius, relative to the atomic radius
+        num_vertices (Real): Number of vertices used to draw each cap of the frustum.
+    """
+
+    def spawn_bond_from_atoms(self,
+                              atom_start: ase.Atom,
+                              atom_end: ase.Atom,
+                              offset: Tuple[Real, Real, Real] = (0, 0, 0)) -> bpy.types.Object:
+        """Draws an instance of the prototype frustum for the two atoms' elements.
+
+        Args:
+            atom_start (ase.Atom): Atom at the start of the bond.
+            atom_end (ase.Atom): Atom at the end of the bond.
+            offset (Tuple[Real, Real, Real]): Vector of length 3, which gets
+                                              added to each atomic position
+
+        Returns:
+            bpy.types.Object: A reference to the object that was created.
+        """
+        prototype = self.prototype_mesh(atom_start.number, atom_end.number)
+        bond_object = bpy.data.objects.new(f"bond_{atom_start.symbol}-{atom_end.symbol}_instance", prototype)
+        self.place_bond_object(bond_object, atom_start.position, atom_end.position, offset)
+        bpy.context.view_layer.active_layer_collection.collection.objects.link(bond_object)
+        return bond_object
+
+    def restyle_bonds(self, bonds: List[Bond]) -> List[Bond]:
+        """Points already-drawn bonds at this style's prototypes. No mesh data is written, unless a prototype
+        has not been made yet.
+
+        Args:
+            bonds (List[Bond]): Bonds that have already been drawn.
+
+        Returns:
+            List[Bond]: The bonds that were restyled.
+        """
+        for bond in bonds:
+            old_mesh = bond.blender_object.data
+            bond.blender_object.data = self.prototype_mesh(bond.source_atom.number, bond.destination_atom.number)
+            if old_mesh.users == 0:
+                # The bond had a mesh of its own, which nothing uses anymore
+                bpy.data.meshes.remove(old_mesh)
+            self.place_bond_object(bond.blender_object, bond.source_atom.position, bond.destination_atom.position,
+                                   bond.offset)
+            bond.drawn_style = copy.copy(self)
+        return bonds
+
+    def move_bonds(self, bonds: List[Bond]) -> List[Bond]:
+        """Moves already-drawn bonds after their atoms have moved, by updating the transform of each instance.
+
+        Args:
+            bonds (List[Bond]): Bonds that have already been drawn with this style.
+
+        Returns:
+            List[Bond]: The bonds that were moved.
+        """
+        for bond in bonds:
+            self.place_bond_object(bond.blender_object, bond.source_atom.position,
+                                   bond.destination_atom.position, bond.offset)
+        return bonds
+
+    def place_bond_object(self, bond_object: bpy.types.Object,
+                          start_position: np.ndarray,
+                          end_position: np.ndarray,
+                          offset: Tuple[Real, Real, Real] = (0, 0, 0)) -> bpy.types.Object:
+        """Moves a bond's object so the prototype is stretched between the two given positions.
+
+        Args:
+            bond_object (bpy.types.Object): Object representing the bond.
+            start_position (np.ndarray): Position of the atom at the start of the bond.
+            end_position (np.ndarray): Position of the atom at the end of the bond.
+            offset (Tuple[Real, Real, Real]): Vector of length 3, which gets added to each atomic position
+
+        Returns:
+            bpy.types.Object: The object that was moved.
+        """
+        super().place_bond_object(bond_object, start_position, end_position, offset)
+        bond_object.scale = (1, 1, np.linalg.norm(end_position - start_position))
+        return bond_object
+
+    def prototype_mesh(self, start_number: int, end_number: int) -> bpy.types.Mesh:
+        """Gets the unit-length frustum shared by every bond between two elements, making it if it has not
+        been made yet. Like generic_glass, prototypes are looked up in bpy.data by name.
+
+        Args:
+            start_number (int): Atomic number of the atom at the start of the bond.
+            end_number (int): Atomic number of the atom at the end of the bond.
+
+        Returns:
+            bpy.types.Mesh: The prototype mesh, spanning Z = -0.5 to Z = 0.5.
+        """
+        start_symbol = ase.data.chemical_symbols[start_number]
+        end_symbol = ase.data.chemical_symbols[end_number]
+        mesh_name = f"{PACKAGE_PREFIX}_bond_{start_symbol}-{end_symbol}_{self.scale_factor}_{self.num_vertices}"
+        mesh = bpy.data.meshes.get(mesh_name)
+        if mesh is None:
+            vertices = frustum_vertices(ase.data.covalent_radii[start_number] * self.scale_factor,
+                                        ase.data.covalent_radii[end_number] * self.scale_factor,
+                                        1.0,
+                                        self.num_vertices)[0]
+            faces, face_sizes = frustum_faces(self.num_vertices)
+            mesh = fill_mesh(bpy.data.meshes.new(mesh_name), vertices, faces, face_sizes, smooth=True)
+            mesh.materials.append(generic_glass())
+        return mesh
+
+
+def remove_bond_object(bond_object: bpy.types.Object) -> None:
+    """Removes a bond's object, along with its mesh unless other objects still use it, like the shared
+    prototypes of instanced bonds.
+
+    Args:
+        bond_object (bpy.types.Object): Object representing the bond.
+    """
+    mesh = bond_object.data
+    bpy.data.objects.remove(bond_object, do_unlink=True)
+    if mesh is not None and mesh.users == 0:
+        bpy.data.meshes.remove(mesh)
+
+
+def frustum_vertices(start_radii, end_radii, depths, num_vertices: int) -> np.ndarray:
+    """Calculates the vertices of one or more frustums, centered on the origin and pointing along Z.
+    Each frustum has a ring of num_vertices at each end, followed by the center of each end cap.
+
+    Args:
+        start_radii (array-like): Radius of the cap at -Z, one per frustum (or a scalar).
+        end_radii (array-like): Radius of the cap at +Z, one per frustum (or a scalar).
+        depths (array-like): Distance between the two caps, one per frustum (or a scalar).
+        num_vertices (int): Number of vertices in each cap's ring.
+
+    Returns:
+        np.ndarray: Array with shape (num_frustums, 2 * num_vertices + 2, 3).
+    """
+    start_radii, end_radii, depths = np.broadcast_arrays(np.atleast_1d(start_radii),
+                                                         np.atleast_1d(end_radii),
+                                                         np.atleast_1d(depths))
+    angles = np.linspace(0, 2 * np.pi, num_vertices, endpoint=False)
+    ring = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+    vertices = np.zeros((len(depths), 2 * num_vertices + 2, 3))
+    vertices[:, :num_vertices, :2] = start_radii[:, None, None] * ring
+    vertices[:, num_vertices:2 * num_vertices, :2] = end_radii[:, None, None] * ring
+    vertices[:, :num_vertices, 2] = -depths[:, None] / 2
+    vertices[:, num_vertices:, 2] = depths[:, None] / 2
+    vertices[:, 2 * num_vertices, 2] = -depths / 2
+    return vertices
+
+
+def frustum_faces(num_vertices: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculates the faces of a frustum whose vertices are laid out as in frustum_vertices.
+    The sides are quads, and the end caps are triangle fans.
+
+    Args:
+        num_vertices (int): Number of vertices in each cap's ring.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Flat array of the vertex indices of each face, and the size of each face.
+    """
+    ring = np.arange(num_vertices)
+    next_ring = np.roll(ring, -1)
+    start_center, end_center = 2 * num_vertices, 2 * num_vertices + 1
+
+    sides = np.stack([ring, next_ring, next_ring + num_vertices, ring + num_vertices], axis=1)
+    start_cap = np.stack([np.full(num_vertices, start_center), next_ring, ring], axis=1)
+    end_cap = np.stack([np.full(num_vertices, end_center), ring + num_vertices, next_ring + num_vertices], axis=1)
+
+    faces = np.concatenate([sides.ravel(), start_cap.ravel(), end_cap.ravel()])
+    face_sizes = np.array([4] * num_vertices + [3] * (2 * num_vertices))
+    return faces, face_sizes
+
+
 GLASS_BSDF_INPUTS = {
     "Color": 0,
     "Roughness": 1,
@@ -3,43 +3,139 @@ Definition for the Chemical class, acting as an interface between ASE and Blende
 """
 from __future__ import annotations
 import time
+from typing import Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import bpy
 import ase
 import ase.data
 import ase.io
 
-from utils.bond import BondBag
+from utils.atom_filters import AtomFilter
+from utils.bond import Bond, BondBag
+from utils.bond_styles import BondStyle
+from utils.contacts import ContactBag
+from utils.coarse_grain import CoarseGrainedStructure, BEAD_RADII, BACKBONE_TUBE_RADIUS
+from utils.footprint import Footprint, collection_footprint
+from utils.mesh_buffers import fill_mesh, set_vertex_positions
+from utils.spatial import SpatialIndex
 
 from utils.material_factory import MaterialFactory
 material_factory = MaterialFactory(materials_are_singleton=True)
 
+# Number of frames room is made for before a trajectory is read. The array doubles whenever it fills up.
+TRAJECTORY_INITIAL_FRAMES = 64
+
+
+def group_by_atomic_number(numbers: np.ndarray) -> List[Tuple[int, np.ndarray]]:
+    """
+    Groups atoms by element in a single pass, by sorting them by atomic number and splitting the result
+    wherever the atomic number changes.
+
+    Args:
+        numbers (np.ndarray): Atomic number of each atom.
+
+    Returns:
+        List[Tuple[int, np.ndarray]]: Each atomic number present, along with the indices of its atoms.
+    """
+    order = np.argsort(numbers, kind="stable")
+    unique_numbers, group_starts = np.unique(numbers[order], return_index=True)
+    return list(zip(unique_numbers.tolist(), np.split(order, group_starts[1:])))
+
+
+def read_trajectory(filepath: str, atom_filter: AtomFilter = None) -> Tuple[ase.Atoms, np.ndarray]:
+    """
+    Reads every frame of a trajectory one at a time, keeping only the positions of the atoms that pass the filter.
+    The positions go straight into one array, grown in place as frames come in, so no more than one frame is
+    ever held as an ase.Atoms object besides the first.
+
+    Args:
+        filepath (str): Path to a file with one or more frames, readable by ase.
+        atom_filter (AtomFilter, optional): Criteria for atoms to keep, judged on the first frame.
+
+    Raises:
+        ValueError: If the file has no frames.
+
+    Returns:
+        Tuple[ase.Atoms, np.ndarray]: The filtered first frame, and an (F, N, 3) array with the positions of
+                                      its atoms in each frame.
+    """
+    images = ase.io.iread(filepath, index=":")
+    atoms = next(images, None)
+    if atoms is None:
+        raise ValueError(f"No frames found in {filepath}")
+    keep = np.ones(len(atoms), dtype=bool) if atom_filter is None else atom_filter.mask(atoms)
+
+    frames = np.empty((TRAJECTORY_INITIAL_FRAMES, np.count_nonzero(keep), 3))
+    frames[0] = atoms.positions[keep]
+    num_frames = 1
+    for image in images:
+        if num_frames == len(frames):
+            # Resized in place where the allocator allows, so the frames read so far usually aren't copied
+            frames.resize((2 * len(frames), *frames.shape[1:]), refcheck=False)
+        frames[num_frames] = image.positions[keep]
+        num_frames += 1
+    frames.resize((num_frames, *frames.shape[1:]), refcheck=False)
+    return atoms[keep], frames
+
 
 class Chemical:
     """
     A chemical species, such as a small molecule, a polymer, a crystal, a protein, etc.
     """
 
-    def __init__(self, atoms: ase.Atoms, context: bpy.context):
+    # Every chemical imported during this session, keyed by the name of its collection
+    registry: Dict[str, Chemical] = {}
+
+    def __init__(self, atoms: ase.Atoms, context: bpy.context,
+                 coarse_grained: CoarseGrainedStructure = None,
+                 representation: str = "ATOMS",
+                 backbone_tube: bool = False,
+                 bond_style: BondStyle = None,
+                 trajectory: np.ndarray = None):
         """
         Init for the chemical object.
 
         Args:
             atoms (ase.Atoms): An ASE Atoms Object represnting the chemical of interest.
             context (bpy.context): Blender context, to be manipulated as the chemical is
+            coarse_grained (CoarseGrainedStructure, optional): Residues of a biomolecule to be drawn as beads.
+                                                               If given, atoms only holds the residues that
+                                                               should be drawn in full detail. Its full
+                                                               structure is released once the beads are drawn.
+            representation (str, optional): "ATOMS", or one of the coarse-grained representations in
+                                            BEAD_RADII ("CA_TRACE" or "RESIDUE_BEADS"). Defaults to "ATOMS".
+            backbone_tube (bool, optional): Whether to draw a tube along the backbone of coarse-grained chains.
+            bond_style (BondStyle, optional): Style used to draw bonds. Defaults to the BondBag's default.
+            trajectory (np.ndarray, optional): (F, N, 3) array with the positions of the atoms in each frame.
         """
-        # TODO: Add support for multi-image structures
+        # Kept for as long as the chemical is, as bonds, spatial queries, contacts and trajectories all read it
         self.atoms = atoms
-        self.__bonds = BondBag(self)
+        self.trajectory = trajectory
+        self.current_frame = 0
+        self.first_frame = context.scene.frame_start
+        self.coarse_grained = coarse_grained
+        self.representation = representation
+        self.backbone_tube = backbone_tube
+        self.__bonds = BondBag(self, bond_style)
+        self.__contacts = ContactBag(self)
         self.__context = context
-        self.name = self.atoms.get_chemical_formula()
+        self.name = (atoms if coarse_grained is None else coarse_grained.atoms).get_chemical_formula()
         self.creation_timestamp = time.time()
         self.radius_scale = 0.8
+        self.origin = np.zeros(3)
+        self.__spatial_index: Optional[SpatialIndex] = None
+
+        # Each point cloud object, and the indices of the atoms its vertices stand for
+        self.__point_clouds: List[Tuple[bpy.types.Object, np.ndarray]] = []
+        # Bonds selected by the last call to select_atoms, so the next one only has to deselect those
+        self.__selected_bonds: List[Bond] = []
 
         # Create a new working directory for the molecule
         self.collection_name = f"Chemical Structure: {self.name}"
         self.collection = bpy.data.collections.new(self.collection_name)
         context.scene.collection.children.link(self.collection)
+        Chemical.registry[self.collection.name] = self
 
     def __hash__(self) -> int:
         return hash(self.name + str(self.creation_timestamp))
@@ -49,13 +145,33 @@ class Chemical:
     # ======
 
     @classmethod
-    def from_file(cls, filepath: str, context: bpy.context) -> Chemical:
+    def from_file(cls, filepath: str, context: bpy.context,
+                  representation: str = "ATOMS",
+                  detailed_residues: Sequence[int] = (),
+                  backbone_tube: bool = False,
+                  atom_filter: AtomFilter = None,
+                  bond_style: BondStyle = None,
+                  trajectory: bool = False) -> Chemical:
         """
         Constructor for when we've got a filepath specified. Reads from disk.
 
         Args:
             filepath (str): Path to the file containing chemical data.
             context (bpy.context): Object containing blender's current context
+            representation (str, optional): "ATOMS" to draw every atom, or "CA_TRACE" / "RESIDUE_BEADS" to draw
+                                            one bead per residue of a biomolecule. Defaults to "ATOMS".
+            detailed_residues (Sequence[int], optional): Residue numbers that are still drawn atom-by-atom when
+                                                         a coarse-grained representation is used.
+            backbone_tube (bool, optional): Whether to draw a tube along the backbone of coarse-grained chains.
+            atom_filter (AtomFilter, optional): Criteria for atoms to keep. It's applied as soon as the file is
+                                                read, so nothing later on is spent on the atoms it removes.
+            bond_style (BondStyle, optional): Style used to draw bonds. Defaults to the BondBag's default.
+            trajectory (bool, optional): Whether to read every frame in the file, rather than only the last one.
+                                         Frames are played back starting at the scene's first frame.
+
+        Raises:
+            ValueError: If a trajectory is requested along with a coarse-grained representation, or the file
+                        has no frames.
 
         Note:
             The filepath argument must be readable by ase in order for the chemical to be loaded.
@@ -63,7 +179,16 @@ class Chemical:
         Returns:
             Chemical: A new instance of the Chemical class.
         """
-        atoms = ase.io.read(filepath)
+        if trajectory and representation != "ATOMS":
+            raise ValueError("Trajectories can only be imported with the atoms representation")
+
+        frames = None
+        if trajectory:
+            atoms, frames = read_trajectory(filepath, atom_filter)
+        else:
+            atoms = ase.io.read(filepath)
+            if atom_filter is not None:
+                atoms = atom_filter.apply(atoms)
 
         # Center the atoms
         # TODO: Make centering optional
@@ -72,9 +197,241 @@ class Chemical:
             pass
         else:
             # System is nonperiodic; we should center it
+            uncentered = atoms.get_positions()
             atoms.center(about=0)
+            if frames is not None and len(atoms):
+                frames += atoms.positions[0] - uncentered[0]
+
+        if representation == "ATOMS":
+            return cls(atoms, context, bond_style=bond_style, trajectory=frames)
+        coarse_grained = CoarseGrainedStructure(atoms)
+        detailed_atoms = atoms[coarse_grained.atom_mask(detailed_residues)]
+        return cls(detailed_atoms, context,
+                   coarse_grained=coarse_grained,
+                   representation=representation,
+                   backbone_tube=backbone_tube,
+                   bond_style=bond_style)
+
+    @classmethod
+    def from_object(cls, blender_object: bpy.types.Object) -> Optional[Chemical]:
+        """
+        Looks up which of the chemicals imported this session a Blender object belongs to.
+
+        Args:
+            blender_object (bpy.types.Object): An atom, bond, or other object spawned by a chemical.
+
+        Returns:
+            Optional[Chemical]: The chemical that owns the object, or None if no chemical does.
+        """
+        for chemical in cls.registered():
+            if blender_object.name in chemical.collection.all_objects:
+                return chemical
+        return None
+
+    @classmethod
+    def registered(cls) -> List[Chemical]:
+        """
+        Lists the chemicals imported this session whose collection still exists. Chemicals whose collection was
+        deleted, or undone, are dropped from the registry along the way, so that their atoms can be freed.
+
+        Returns:
+            List[Chemical]: The chemicals that are still in Blender.
+        """
+        chemicals = []
+        for chemical in list(cls.registry.values()):
+            try:
+                chemical.collection.all_objects
+            except ReferenceError:
+                chemical.unregister()
+            else:
+                chemicals.append(chemical)
+        return chemicals
+
+    def unregister(self) -> Chemical:
+        """
+        Drops the chemical from the registry, so that it's no longer found by from_object or moved by
+        the trajectory handler.
+        """
+        for collection_name, chemical in list(Chemical.registry.items()):
+            if chemical is self:
+                del Chemical.registry[collection_name]
+        return self
+
+    @property
+    def bonds(self) -> BondBag:
+        """Getter method for the chemical's bonds. Setting a new style on the bag restyles drawn bonds in place.
+
+        Returns:
+            BondBag: The bonds between the chemical's atoms.
+        """
+        return self.__bonds
+
+    @property
+    def contacts(self) -> ContactBag:
+        """Getter method for the chemical's non-covalent contacts. Their criteria can be changed on the bag.
+
+        Returns:
+            ContactBag: Finds hydrogen bonds and close contacts between the chemical's atoms.
+        """
+        return self.__contacts
+
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """Getter method for the spatial index over the atomic positions. It's built the first time it's needed.
+
+        Returns:
+            SpatialIndex: Index supporting radius, nearest-neighbor, and box queries.
+        """
+        if self.__spatial_index is None:
+            self.__spatial_index = SpatialIndex(self.atoms.get_positions(), self.atoms.cell, self.atoms.pbc)
+        return self.__spatial_index
+
+    def invalidate_spatial_index(self) -> Chemical:
+        """
+        Discards the spatial index, so that it gets rebuilt on the next query. Call this after moving atoms.
+        """
+        self.__spatial_index = None
+        return self
+
+    def footprint(self) -> Footprint:
+        """
+        Measures how heavy the chemical is to render: its objects, instanced vertices, evaluated triangles,
+        materials, and an estimate of its mesh memory.
+
+        Returns:
+            Footprint: The footprint of the chemical's collection.
+        """
+        return collection_footprint(self.collection, self.__context.evaluated_depsgraph_get())
+
+    def selected_atom_indices(self) -> np.ndarray:
+        """
+        Finds the atoms whose vertices are selected in the chemical's point clouds.
+
+        Returns:
+            np.ndarray: Sorted indices of the selected atoms.
+        """
+        selected = [np.array([], dtype=int)]
+        for point_cloud, atom_indices in self.__point_clouds:
+            if point_cloud.mode == "EDIT":
+                point_cloud.update_from_editmode()
+            is_selected = np.zeros(len(atom_indices), dtype=bool)
+            point_cloud.data.vertices.foreach_get("select", is_selected)
+            selected.append(atom_indices[is_selected])
+        return np.sort(np.concatenate(selected))
+
+    def select_atoms(self, atom_indices: np.ndarray) -> Chemical:
+        """
+        Selects the given atoms, and the bonds touching them. Everything else in the chemical is deselected.
+        Only the bonds touching the atoms, and those the previous call selected, are visited, as selecting
+        objects one at a time is too slow to do for every bond of a large chemical.
+
+        Args:
+            atom_indices (np.ndarray): Indices of the atoms to select.
+        """
+        for point_cloud, cloud_indices in self.__point_clouds:
+            is_selected = np.isin(cloud_indices, atom_indices)
+            point_cloud.data.vertices.foreach_set("select", is_selected)
+            point_cloud.data.update()
+            point_cloud.select_set(bool(is_selected.any()))
+
+        incident_bonds = self.__bonds.incident_bonds(atom_indices)
+        is_incident = set(incident_bonds)
+        for bond in self.__selected_bonds:
+            if bond.blender_object is not None and bond not in is_incident:
+                bond.blender_object.select_set(False)
+        for bond in incident_bonds:
+            if bond.blender_object is not None:
+                bond.blender_object.select_set(True)
+        self.__selected_bonds = incident_bonds
+        return self
+
+    def split_atoms(self, atom_indices: np.ndarray, label: str = "Split") -> bpy.types.Collection:
+        """
+        Moves the given atoms, and the bonds touching them, into their own objects within a new
+        collection nested in the chemical's collection.
 
-        return cls(atoms, context)
+        Args:
+            atom_indices (np.ndarray): Indices of the atoms to split off.
+            label (str, optional): Prefix for the new collection's name. Defaults to "Split".
+
+        Returns:
+            bpy.types.Collection: The collection holding the atoms that were split off.
+        """
+        collection = bpy.data.collections.new(f"{label}: {self.name}")
+        self.collection.children.link(collection)
+        positions = self.atoms.get_positions() + self.origin
+
+        point_clouds = []
+        for point_cloud, cloud_indices in self.__point_clouds:
+            is_moved = np.isin(cloud_indices, atom_indices)
+            if is_moved.all():
+                for blender_object in (point_cloud, *point_cloud.children):
+                    self.__move_object(blender_object, collection)
+            elif is_moved.any():
+                fill_mesh(point_cloud.data, positions[cloud_indices[~is_moved]])
+                point_clouds.append((point_cloud, cloud_indices[~is_moved]))
+
+                split_mesh = fill_mesh(bpy.data.meshes.new(point_cloud.data.name), positions[cloud_indices[is_moved]])
+                split_cloud = bpy.data.objects.new(point_cloud.name, split_mesh)
+                split_cloud.instance_type = "VERTS"
+                collection.objects.link(split_cloud)
+                for instance in point_cloud.children:
+                    split_instance = instance.copy()
+                    split_instance.parent = split_cloud
+                    collection.objects.link(split_instance)
+                    split_instance.hide_set(True)
+                point_cloud, cloud_indices = split_cloud, cloud_indices[is_moved]
+            point_clouds.append((point_cloud, cloud_indices))
+        self.__point_clouds = point_clouds
+
+        for bond in self.__bonds.incident_bonds(atom_indices):
+            if bond.blender_object is not None:
+                self.__move_object(bond.blender_object, collection)
+        return collection
+
+    def hide_atoms(self, atom_indices: np.ndarray) -> bpy.types.Collection:
+        """
+        Hides the given atoms, and the bonds touching them, from the viewport and from renders.
+        They're split off into their own collection, so they can be brought back by un-hiding it.
+
+        Args:
+            atom_indices (np.ndarray): Indices of the atoms to hide.
+
+        Returns:
+            bpy.types.Collection: The collection holding the hidden atoms.
+        """
+        collection = self.split_atoms(atom_indices, label="Hidden")
+        collection.hide_viewport = True
+        collection.hide_render = True
+        return collection
+
+    def set_frame(self, frame: int) -> Chemical:
+        """
+        Moves the atoms to a frame of the trajectory. The point clouds are updated in place, and the bonds
+        are re-evaluated, so bonds that break or form along the trajectory are removed or drawn.
+
+        Args:
+            frame (int): Index of the frame, counting from 0. Clamped to the frames in the trajectory.
+        """
+        if self.trajectory is None:
+            return self
+        frame = int(np.clip(frame, 0, len(self.trajectory) - 1))
+        if frame == self.current_frame:
+            return self
+        self.current_frame = frame
+        self.atoms.positions = self.trajectory[frame]
+        self.invalidate_spatial_index()
+
+        positions = np.asarray(self.trajectory[frame] + self.origin, dtype=np.float32)
+        for point_cloud, atom_indices in self.__point_clouds:
+            set_vertex_positions(point_cloud.data, positions[atom_indices])
+
+        # New bonds should wind up in this chemical's collection
+        prev_collection = self.__context.view_layer.active_layer_collection
+        self.__context.view_layer.active_layer_collection = self.__layer_collection()
+        self.__bonds.update_topology(offset=self.origin)
+        self.__context.view_layer.active_layer_collection = prev_collection
+        return self
 
     def add_structure_to_scene(self) -> Chemical:
         """
@@ -89,6 +446,11 @@ class Chemical:
         molecule_layer_collection = self.__context.view_layer.layer_collection.children[-1]
         self.__context.view_layer.active_layer_collection = molecule_layer_collection
 
+        self.origin = np.array(self.__context.scene.cursor.location)
+        if self.coarse_grained is not None:
+            self.__spawn_coarse_grained()
+            # Only the beads are drawn from the full structure, so it can go. The detailed atoms stay in self.atoms.
+            self.coarse_grained.release_atoms()
         self.__spawn_chemical()
         self.__spawn_bonds()
 
@@ -109,51 +471,77 @@ class Chemical:
         """
         return self.__context.view_layer.active_layer_collection.collection
 
+    def __layer_collection(self, layer_collection: bpy.types.LayerCollection = None) -> bpy.types.LayerCollection:
+        """Finds the layer collection of the chemical's collection in the view layer.
+
+        Args:
+            layer_collection (bpy.types.LayerCollection, optional): Where to start looking. Defaults to the root.
+
+        Returns:
+            bpy.types.LayerCollection: The layer collection, or None if it isn't in the view layer.
+        """
+        if layer_collection is None:
+            layer_collection = self.__context.view_layer.layer_collection
+        if layer_collection.collection == self.collection:
+            return layer_collection
+        for child in layer_collection.children:
+            found = self.__layer_collection(child)
+            if found is not None:
+                return found
+        return None
+
+    @staticmethod
+    def __move_object(blender_object: bpy.types.Object, collection: bpy.types.Collection) -> None:
+        """Unlinks an object from the collections it's in, and links it to another.
+
+        Args:
+            blender_object (bpy.types.Object): Object to move.
+            collection (bpy.types.Collection): Collection the object will be moved into.
+        """
+        for previous_collection in blender_object.users_collection:
+            previous_collection.objects.unlink(blender_object)
+        collection.objects.link(blender_object)
+
     def __spawn_chemical(self) -> Chemical:
         """
         This will create a molecule object from the atoms object stored in this class.
         """
-        unique_symbols = set(self.atoms.get_chemical_symbols())
-        for symbol in unique_symbols:
+        # Single-precision copy of the positions, which is what Blender stores vertices as anyway
+        positions = np.asarray(self.atoms.positions + self.origin, dtype=np.float32)
+
+        for number, atom_indices in group_by_atomic_number(self.atoms.numbers):
+            symbol = ase.data.chemical_symbols[number]
+
             # Create the mesh
-            selected_atoms = self.atoms[self.atoms.symbols == symbol]
-            homonuclear_mesh = self.__mesh_from_atoms(selected_atoms)
+            homonuclear_mesh = self.__mesh_from_positions(positions[atom_indices])
 
             # Add the mesh to the collection
             homonuclear_positions_name = f"PointCloud_{symbol}_{self.collection_name}"
             homonuclear_object = bpy.data.objects.new(homonuclear_positions_name, homonuclear_mesh)
             homonuclear_object.instance_type = "VERTS"
             self.__active_collection.objects.link(homonuclear_object)
+            self.__point_clouds.append((homonuclear_object, atom_indices))
 
             # Create and bind instances for the atomic type
             nurbs = self.__spawn_nurbs_from_atomic_symbol(symbol)
             nurbs.parent = homonuclear_object
         return self
 
-    def __mesh_from_atoms(self, atoms: ase.Atoms, mesh_name: str = None) -> bpy.types.Mesh:
+    def __mesh_from_positions(self, positions: np.ndarray, mesh_name: str = None) -> bpy.types.Mesh:
         """
-        Creates a point cloud based on the atomic positions passed in.
+        Creates a point cloud based on the positions passed in. The positions are copied straight into the
+        mesh's vertex buffer, skipping validation, as a point cloud has no edges or faces that could be invalid.
 
         Args:
-            atoms (ase.Atoms): An ASE Atoms object that will be used to generate the mesh.
+            positions (np.ndarray): (N, 3) array of positions, already offset to where they should be drawn.
             mesh_name (str, optional): Name that will be given to the mesh in Blender. Defaults to None.
 
         Returns:
-            bpy.types.Mesh: A mesh representing the chemical species in the atoms object.
+            bpy.types.Mesh: A mesh with one vertex per position.
         """
         if mesh_name is None:
             mesh_name = f"Mesh_{self.collection_name}"
-
-        verts = atoms.get_positions() + self.__context.scene.cursor.location
-        edges = []
-        faces = []
-
-        mesh = bpy.data.meshes.new(mesh_name)
-        mesh.from_pydata(verts, edges, faces)
-        mesh.validate()
-        mesh.update()
-
-        return mesh
+        return fill_mesh(bpy.data.meshes.new(mesh_name), positions)
 
     def __spawn_nurbs_from_atomic_symbol(self, atom_type: str) -> bpy.types.Object:
         """Spawns a NURBs sphere at the cursor with radius proportional to the element's covalent radius.
@@ -168,26 +556,119 @@ class Chemical:
         atomic_number = ase.data.atomic_numbers[atom_type]
         covalent_radius = ase.data.covalent_radii[atomic_number]
 
-        # Spawn the atom, set its name, and hide it from renders
-        bpy.ops.surface.primitive_nurbs_surface_sphere_add(radius=covalent_radius * self.radius_scale,
+        material = material_factory.get_material(atom_type, self.name)
+        return self.__spawn_nurbs_sphere(f"instance_{atom_type}", covalent_radius * self.radius_scale, material)
+
+    def __spawn_nurbs_sphere(self, name: str, radius: float, material: bpy.types.Material) -> bpy.types.Object:
+        """Spawns a NURBs sphere at the cursor, to be instanced on the vertices of a point cloud.
+        The sphere itself is hidden from the viewport and from renders.
+
+        Args:
+            name (str): Name given to the sphere.
+            radius (float): Radius of the sphere.
+            material (bpy.types.Material): Material given to the sphere.
+
+        Returns:
+            bpy.types.Object: The NURBs sphere that was created.
+        """
+        # Spawn the sphere, set its name, and hide it from renders
+        bpy.ops.surface.primitive_nurbs_surface_sphere_add(radius=radius,
                                                            location=self.__context.scene.cursor.location)
-        bpy.context.active_object.name = f"instance_{atom_type}"
+        bpy.context.active_object.name = name
         bpy.context.active_object.hide_render = True
         bpy.context.active_object.hide_set(True)
 
-        # Give the atom a material
-        material = material_factory.get_material(atom_type, self.name)
+        # Give the sphere a material
         bpy.context.active_object.active_material = material
 
         # Store a reference to the object we created
         current_object = bpy.context.active_object
         return current_object
 
+    def __spawn_coarse_grained(self) -> Chemical:
+        """
+        Spawns one bead per residue, with one point cloud per chain so that each chain gets its own color.
+        """
+        if self.representation == "CA_TRACE":
+            bead_positions = self.coarse_grained.alpha_carbon_positions()
+        else:
+            bead_positions = self.coarse_grained.centroids()
+        bead_positions += self.origin
+
+        for chain in range(self.coarse_grained.num_chains):
+            material = material_factory.get_chain_material(chain, self.name)
+            in_chain = self.coarse_grained.chain_of_residue == chain
+
+            bead_mesh = fill_mesh(bpy.data.meshes.new(f"Mesh_chain_{chain}_{self.collection_name}"),
+                                  bead_positions[in_chain])
+            beads = bpy.data.objects.new(f"Beads_chain_{chain}_{self.collection_name}", bead_mesh)
+            beads.instance_type = "VERTS"
+            self.__active_collection.objects.link(beads)
+
+            bead = self.__spawn_nurbs_sphere(f"instance_chain_{chain}", BEAD_RADII[self.representation], material)
+            bead.parent = beads
+
+            if self.backbone_tube:
+                self.__spawn_backbone_tube(chain, material)
+        return self
+
+    def __spawn_backbone_tube(self, chain: int, material: bpy.types.Material) -> Optional[bpy.types.Object]:
+        """Spawns a tube following the alpha carbons of a chain.
+
+        Args:
+            chain (int): Index of the chain.
+            material (bpy.types.Material): Material given to the tube.
+
+        Returns:
+            Optional[bpy.types.Object]: The tube, or None if the chain has fewer than two alpha carbons.
+        """
+        backbone = self.coarse_grained.backbone(chain)
+        if len(backbone) < 2:
+            return None
+
+        name = f"Backbone_chain_{chain}_{self.collection_name}"
+        curve = bpy.data.curves.new(name, "CURVE")
+        curve.dimensions = "3D"
+        curve.bevel_depth = BACKBONE_TUBE_RADIUS
+        curve.bevel_resolution = 4
+        curve.use_fill_caps = True
+        curve.materials.append(material)
+
+        # Spline points are 4D; the last coordinate is the point's weight
+        points = np.ones((len(backbone), 4), dtype=np.float32)
+        points[:, :3] = backbone + self.origin
+        spline = curve.splines.new("NURBS")
+        spline.points.add(len(points) - 1)
+        spline.points.foreach_set("co", points.ravel())
+        spline.use_endpoint_u = True
+
+        tube = bpy.data.objects.new(name, curve)
+        self.__active_collection.objects.link(tube)
+        return tube
+
     def __spawn_bonds(self) -> Chemical:
         """
         Spawns all bonds into the scene.
         """
-        offset = self.__context.scene.cursor.location
+        offset = self.origin
         for bond in self.__bonds:
             bond.draw(offset)
         return self
+
+
+def update_trajectories(scene: bpy.types.Scene, *args) -> None:
+    """
+    Frame change handler, moving every chemical imported as a trajectory to the scene's current frame.
+    Chemicals whose objects have been deleted are dropped from the registry.
+
+    Args:
+        scene (bpy.types.Scene): The scene whose frame changed.
+    """
+    for chemical in Chemical.registered():
+        if chemical.trajectory is None:
+            continue
+        try:
+            chemical.set_frame(scene.frame_current - chemical.first_frame)
+        except ReferenceError:
+            # Some of the chemical's objects were deleted, even though its collection wasn't
+            chemical.unregister()
@@ -0,0 +1,181 @@
+"""
+Coarse-grained views of biomolecules, where each residue is drawn as a single bead instead of as its atoms.
+"""
+from __future__ import annotations
+from typing import Sequence
+
+import numpy as np
+import ase
+
+# Radius of the bead drawn for each residue, in Angstrom, for each coarse-grained representation
+BEAD_RADII = {
+    "CA_TRACE": 1.0,
+    "RESIDUE_BEADS": 2.4,
+}
+BACKBONE_TUBE_RADIUS = 0.4
+
+# Consecutive alpha carbons further apart than this (in Angstrom) can't be in the same chain
+CHAIN_BREAK_DISTANCE = 4.2
+
+
+class CoarseGrainedStructure:
+    """
+    Groups the atoms of a biomolecule into residues and chains, using the per-atom residue information
+    that ASE reads from PDB files (the "residuenumbers", "residuenames" and "atomtypes" arrays).
+
+    ASE doesn't keep the chain identifiers, so chains are inferred: a new chain starts wherever the residue
+    numbering goes backwards, or where two consecutive alpha carbons are too far apart to be bonded.
+
+    Once the beads have been drawn, release_atoms can drop the atomistic structure, keeping only what the beads
+    need, which matters for the largest assemblies (such as viral capsids).
+
+    Attributes:
+        atoms (ase.Atoms): The full, atomistic structure, or None once released.
+        residue_of_atom (np.ndarray): Index of the residue each atom belongs to, or None once released.
+        residue_numbers (np.ndarray): Residue number of each residue, as given in the file.
+        residue_names (np.ndarray): Three-letter name of each residue.
+        chain_of_residue (np.ndarray): Index of the chain each residue belongs to.
+    """
+
+    def __init__(self, atoms: ase.Atoms):
+        """
+        Init for the coarse-grained structure.
+
+        Args:
+            atoms (ase.Atoms): Structure read from a biomolecular file.
+
+        Raises:
+            ValueError: If the atoms don't carry residue information.
+        """
+        if "residuenumbers" not in atoms.arrays or "atomtypes" not in atoms.arrays:
+            raise ValueError("Coarse-graining requires residue information, such as that read from a PDB file")
+        self.atoms = atoms
+
+        numbers = atoms.arrays["residuenumbers"]
+        names = atoms.arrays["residuenames"]
+        is_first_atom = np.ones(len(atoms), dtype=bool)
+        is_first_atom[1:] = (numbers[1:] != numbers[:-1]) | (names[1:] != names[:-1])
+        self.__residue_starts = np.flatnonzero(is_first_atom)
+        self.residue_of_atom = np.cumsum(is_first_atom) - 1
+        self.residue_numbers = numbers[self.__residue_starts]
+        self.residue_names = names[self.__residue_starts]
+
+        # Alpha carbon of each residue, or -1 for residues without one (ligands, waters, etc.)
+        is_alpha_carbon = np.char.strip(atoms.arrays["atomtypes"].astype(str)) == "CA"
+        self.__alpha_carbons = np.full(self.num_residues, -1)
+        self.__alpha_carbons[self.residue_of_atom[is_alpha_carbon]] = np.flatnonzero(is_alpha_carbon)
+
+        self.chain_of_residue = self.__infer_chains()
+
+        # Per-residue positions, kept once the atoms are released
+        self.__centroids = None
+        self.__alpha_carbon_positions = None
+
+    def __len__(self) -> int:
+        return self.num_residues
+
+    def __repr__(self):
+        return f"CoarseGrainedStructure with {self.num_residues} residues in {self.num_chains} chains"
+
+    @property
+    def num_residues(self) -> int:
+        """Number of residues in the structure."""
+        return len(self.__residue_starts)
+
+    @property
+    def num_chains(self) -> int:
+        """Number of chains in the structure."""
+        return int(self.chain_of_residue.max()) + 1 if self.num_residues else 0
+
+    # ======
+    # Public
+    # ======
+
+    def centroids(self) -> np.ndarray:
+        """Calculates the center of each residue, as the mean of its atomic positions.
+
+        Returns:
+            np.ndarray: (num_residues, 3) array of positions.
+        """
+        if self.atoms is None:
+            return self.__centroids.copy()
+        sums = np.add.reduceat(self.atoms.positions, self.__residue_starts, axis=0)
+        counts = np.diff(np.append(self.__residue_starts, len(self.atoms)))
+        return sums / counts[:, None]
+
+    def alpha_carbon_positions(self) -> np.ndarray:
+        """Finds the alpha carbon of each residue. Residues without one are placed at their centroid.
+
+        Returns:
+            np.ndarray: (num_residues, 3) array of positions.
+        """
+        if self.atoms is None:
+            return self.__alpha_carbon_positions.copy()
+        positions = self.centroids()
+        has_alpha_carbon = self.__alpha_carbons >= 0
+        positions[has_alpha_carbon] = self.atoms.positions[self.__alpha_carbons[has_alpha_carbon]]
+        return positions
+
+    def backbone(self, chain: int) -> np.ndarray:
+        """Positions of the alpha carbons along a chain, in order. Residues without one are skipped.
+
+        Args:
+            chain (int): Index of the chain.
+
+        Returns:
+            np.ndarray: (M, 3) array of positions.
+        """
+        in_chain = (self.chain_of_residue == chain) & (self.__alpha_carbons >= 0)
+        if self.atoms is None:
+            return self.__alpha_carbon_positions[in_chain]
+        return self.atoms.positions[self.__alpha_carbons[in_chain]]
+
+    def atom_mask(self, residue_numbers: Sequence[int]) -> np.ndarray:
+        """Finds the atoms belonging to the residues with the given numbers, in every chain.
+
+        Args:
+            residue_numbers (Sequence[int]): Residue numbers, as given in the file.
+
+        Raises:
+            ValueError: If the atoms have been released.
+
+        Returns:
+            np.ndarray: Boolean mask over the atoms.
+        """
+        if self.atoms is None:
+            raise ValueError("The atoms of this structure have been released")
+        return np.isin(self.atoms.arrays["residuenumbers"], residue_numbers)
+
+    def release_atoms(self) -> CoarseGrainedStructure:
+        """Drops the atomistic structure and the per-atom arrays, after keeping the centroid and alpha carbon
+        position of each residue. The beads and backbones can still be drawn afterwards, but atom_mask can't be
+        used anymore.
+
+        Returns:
+            CoarseGrainedStructure: This structure.
+        """
+        if self.atoms is not None:
+            self.__centroids = self.centroids()
+            self.__alpha_carbon_positions = self.alpha_carbon_positions()
+            self.atoms = None
+            self.residue_of_atom = None
+        return self
+
+    # =======
+    # Private
+    # =======
+
+    def __infer_chains(self) -> np.ndarray:
+        """Assigns each residue to a chain, based on breaks in the residue numbering and in the backbone.
+
+        Returns:
+            np.ndarray: Index of the chain each residue belongs to.
+        """
+        is_chain_start = np.zeros(self.num_residues, dtype=bool)
+        is_chain_start[1:] = self.residue_numbers[1:] < self.residue_numbers[:-1]
+
+        both_have_alpha_carbons = (self.__alpha_carbons[1:] >= 0) & (self.__alpha_carbons[:-1] >= 0)
+        gaps = np.linalg.norm(self.atoms.positions[self.__alpha_carbons[1:]]
+                              - self.atoms.positions[self.__alpha_carbons[:-1]], axis=1)
+        is_chain_start[1:] |= both_have_alpha_carbons & (gaps > CHAIN_BREAK_DISTANCE)
+        return np.cumsum(is_chain_start)
@@ -0,0 +1,265 @@
+"""
+Contacts class, finds the non-covalent contacts (hydrogen bonds, close contacts) between the atoms of a chemical.
+"""
+from __future__ import annotations
+from numbers import Real
+from typing import Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+import scipy.sparse
+import ase
+import ase.data
+import ase.geometry
+import ase.neighborlist
+import bpy
+
+if TYPE_CHECKING:
+    from chemical import Chemical
+from utils.bond_styles import frustum_faces, frustum_vertices
+from utils.mesh_buffers import fill_mesh
+
+HYDROGEN_BOND_ELEMENTS = ("N", "O", "F")
+
+# Van der Waals radius used for elements that ASE doesn't have one for, in Angstrom
+FALLBACK_VDW_RADIUS = 2.0
+
+
+class ContactBag:
+    """
+    The non-covalent contacts of a chemical. Covalent bonds come from the chemical's BondBag. Candidate pairs
+    come from a search of its own with ASE's neighbor_list, using cutoffs wide enough for each kind of contact,
+    after which every criterion is evaluated over all candidates at once. Contacts aren't stored, as they
+    change whenever the atoms move, so each query searches again.
+
+    Attributes:
+        donor_elements (Tuple[str]): Elements whose hydrogens can be donated.
+        acceptor_elements (Tuple[str]): Elements that can accept a hydrogen bond.
+        max_hydrogen_acceptor (Real): Longest H···A distance of a hydrogen bond, in Angstrom.
+        max_donor_acceptor (Real): Longest D···A distance of a hydrogen bond, in Angstrom.
+        min_angle (Real): Smallest D-H···A angle of a hydrogen bond, in degrees.
+        contact_overlap (Real): How much closer than the sum of their Van der Waals radii two atoms must be to be
+                                in close contact, in Angstrom. Negative values allow them to be further apart.
+        min_bond_separation (int): Atoms fewer than this many bonds apart are never in close contact.
+    """
+
+    def __init__(self, chemical: Chemical,
+                 donor_elements: Sequence[str] = HYDROGEN_BOND_ELEMENTS,
+                 acceptor_elements: Sequence[str] = HYDROGEN_BOND_ELEMENTS,
+                 max_hydrogen_acceptor: Real = 2.5,
+                 max_donor_acceptor: Real = 3.5,
+                 min_angle: Real = 120.0,
+                 contact_overlap: Real = 0.0,
+                 min_bond_separation: int = 4):
+        """
+        Init for the contacts. Default criteria for hydrogen bonds are the usual geometric ones.
+
+        Args:
+            chemical (Chemical): Chemical species, same as the Chemical class defined in this addon.
+            donor_elements (Sequence[str], optional): Elements whose hydrogens can be donated. Defaults to N, O, F.
+            acceptor_elements (Sequence[str], optional): Elements that can accept a hydrogen bond.
+                                                         Defaults to N, O, F.
+            max_hydrogen_acceptor (Real, optional): Longest H···A distance, in Angstrom. Defaults to 2.5.
+            max_donor_acceptor (Real, optional): Longest D···A distance, in Angstrom. Defaults to 3.5.
+            min_angle (Real, optional): Smallest D-H···A angle, in degrees. Defaults to 120.
+            contact_overlap (Real, optional): How much the Van der Waals spheres of atoms in close contact must
+                                              overlap, in Angstrom. Defaults to 0.
+            min_bond_separation (int, optional): Atoms fewer than this many bonds apart are never in close contact.
+                                                 Defaults to 4, which skips 1-2, 1-3 and 1-4 pairs.
+        """
+        self._chemical: Chemical = chemical
+        self.donor_elements = tuple(donor_elements)
+        self.acceptor_elements = tuple(acceptor_elements)
+        self.max_hydrogen_acceptor = max_hydrogen_acceptor
+        self.max_donor_acceptor = max_donor_acceptor
+        self.min_angle = min_angle
+        self.contact_overlap = contact_overlap
+        self.min_bond_separation = min_bond_separation
+
+    def __repr__(self):
+        return f"ContactBag for {self._chemical}"
+
+    # ======
+    # Public
+    # ======
+
+    def hydrogen_bonds(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Finds every donor-H···acceptor geometry that meets the distance and angle criteria.
+        A hydrogen's donor is the heavy atom it's covalently bonded to.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (M, 3) array of the donor, hydrogen and acceptor of each hydrogen bond,
+                                           and (M, 3) array of the vectors from each hydrogen to its acceptor.
+        """
+        atoms = self._chemical.atoms
+        numbers = atoms.numbers
+        is_hydrogen = numbers == ase.data.atomic_numbers["H"]
+        is_donor = np.isin(numbers, [ase.data.atomic_numbers[symbol] for symbol in self.donor_elements])
+        is_acceptor = np.isin(numbers, [ase.data.atomic_numbers[symbol] for symbol in self.acceptor_elements])
+
+        # Donor of each hydrogen, from the covalent bonds, or -1 for hydrogens not bonded to a donor
+        adjacency = self.__symmetric_adjacency().tocoo()
+        is_donated = is_hydrogen[adjacency.row] & is_donor[adjacency.col]
+        donor_of = np.full(len(atoms), -1)
+        donor_of[adjacency.row[is_donated]] = adjacency.col[is_donated]
+
+        # Candidate H···A pairs, searched for among the donated hydrogens and the acceptors only
+        subset = np.flatnonzero((donor_of >= 0) | is_acceptor)
+        first, second, to_second = ase.neighborlist.neighbor_list("ijD", atoms[subset],
+                                                                  self.max_hydrogen_acceptor,
+                                                                  self_interaction=False)
+        hydrogens, acceptors = subset[first], subset[second]
+        is_candidate = (donor_of[hydrogens] >= 0) & is_acceptor[acceptors] & (acceptors != donor_of[hydrogens])
+        hydrogens, acceptors, to_acceptor = hydrogens[is_candidate], acceptors[is_candidate], to_second[is_candidate]
+        donors = donor_of[hydrogens]
+
+        to_donor, _ = ase.geometry.find_mic(atoms.positions[donors] - atoms.positions[hydrogens],
+                                            atoms.cell, atoms.pbc)
+        donor_acceptor = np.linalg.norm(to_acceptor - to_donor, axis=1)
+        cosines = (np.einsum("ij,ij->i", to_donor, to_acceptor)
+                   / (np.linalg.norm(to_donor, axis=1) * np.linalg.norm(to_acceptor, axis=1)))
+        is_bond = (donor_acceptor <= self.max_donor_acceptor) & (cosines <= np.cos(np.radians(self.min_angle)))
+        return np.stack([donors, hydrogens, acceptors], axis=1)[is_bond], to_acceptor[is_bond]
+
+    def close_contacts(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Finds every pair of atoms closer than the sum of their Van der Waals radii, less the overlap,
+        that are at least min_bond_separation bonds apart.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (M, 2) array of the atoms in each contact, lower index first,
+                                           and (M, 3) array of the vectors from the first atom to the second.
+        """
+        atoms = self._chemical.atoms
+        radii = ase.data.vdw_radii[atoms.numbers]
+        radii = np.where(np.isnan(radii), FALLBACK_VDW_RADIUS, radii)
+        first, second, separations = ase.neighborlist.neighbor_list("ijD", atoms, radii - self.contact_overlap / 2,
+                                                                    self_interaction=False)
+        is_half = first < second
+        first, second, separations = first[is_half], second[is_half], separations[is_half]
+
+        # Pairs within a few bonds of each other are compared through a single integer key per pair
+        nearby = self.__pairs_within_bonds(self.min_bond_separation - 1)
+        is_contact = ~np.isin(first * len(atoms) + second, nearby)
+        return np.stack([first, second], axis=1)[is_contact], separations[is_contact]
+
+    # =======
+    # Private
+    # =======
+
+    def __symmetric_adjacency(self) -> scipy.sparse.csr_matrix:
+        """Boolean adjacency matrix of the covalent bonds, with both triangles filled in.
+
+        Returns:
+            scipy.sparse.csr_matrix: The adjacency matrix.
+        """
+        adjacency = scipy.sparse.csr_matrix(self._chemical.bonds.adjacency_matrix, dtype=bool)
+        return (adjacency + adjacency.T).tocsr()
+
+    def __pairs_within_bonds(self, num_bonds: int) -> np.ndarray:
+        """Finds the pairs of atoms joined by a path of at most num_bonds covalent bonds, through powers of the
+        adjacency matrix.
+
+        Args:
+            num_bonds (int): Longest path, in bonds.
+
+        Returns:
+            np.ndarray: Sorted integer key of each pair, as first * num_atoms + second.
+        """
+        num_atoms = len(self._chemical.atoms)
+        adjacency = self.__symmetric_adjacency().astype(np.int32)
+        reachable = scipy.sparse.csr_matrix((num_atoms, num_atoms), dtype=np.int32)
+        path = scipy.sparse.identity(num_atoms, dtype=np.int32, format="csr")
+        for _ in range(num_bonds):
+            path = (path @ adjacency).astype(bool).astype(np.int32)
+            reachable = reachable + path
+        reachable = reachable.tocoo()
+        return np.unique(reachable.row.astype(np.int64) * num_atoms + reachable.col)
+
+
+def spawn_contacts(starts: np.ndarray, vectors: np.ndarray, name: str, collection: bpy.types.Collection,
+                   dashed: bool = True, radius: Real = 0.04, dash_length: Real = 0.2, gap_length: Real = 0.15,
+                   num_vertices: int = 8, location=(0, 0, 0),
+                   material: bpy.types.Material = None) -> bpy.types.Object:
+    """Draws many contacts as a single mesh: either a dashed line of short cylinders for each, or plain edges.
+
+    Args:
+        starts (np.ndarray): (M, 3) array of where each contact starts.
+        vectors (np.ndarray): (M, 3) array of the vector from the start of each contact to its end.
+        name (str): Name for the new object and mesh.
+        collection (bpy.types.Collection): Collection the new object is linked to.
+        dashed (bool, optional): Whether contacts are drawn as dashes, which show up in renders, rather than as
+                                 edges, which are quicker but only show up in the viewport. Defaults to True.
+        radius (Real, optional): Radius of the dashes. Defaults to 0.04.
+        dash_length (Real, optional): Length of each dash. Defaults to 0.2.
+        gap_length (Real, optional): Length of the gaps between dashes. Defaults to 0.15.
+        num_vertices (int, optional): Number of vertices around each dash. Defaults to 8.
+        location (Tuple[Real, Real, Real], optional): Location of the object. Defaults to the world origin.
+        material (bpy.types.Material, optional): Material of the contacts.
+
+    Returns:
+        bpy.types.Object: The new object.
+    """
+    starts = np.asarray(starts, dtype=float).reshape(-1, 3)
+    vectors = np.asarray(vectors, dtype=float).reshape(-1, 3)
+    mesh = bpy.data.meshes.new(name)
+    if dashed:
+        vertices, faces, face_sizes = dash_geometry(starts, vectors, radius, dash_length, gap_length, num_vertices)
+        fill_mesh(mesh, vertices, faces=faces, face_sizes=face_sizes, smooth=True)
+    else:
+        vertices = np.concatenate([starts, starts + vectors])
+        edges = np.stack([np.arange(len(starts)), np.arange(len(starts)) + len(starts)], axis=1)
+        fill_mesh(mesh, vertices, edges=edges)
+    if material is not None:
+        mesh.materials.append(material)
+    contacts = bpy.data.objects.new(name, mesh)
+    contacts.location = location
+    collection.objects.link(contacts)
+    return contacts
+
+
+def dash_geometry(starts: np.ndarray, vectors: np.ndarray, radius: Real, dash_length: Real, gap_length: Real,
+                  num_vertices: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Lays out the dashes of many dashed lines at once. Each line gets as many whole dashes as fit, centered
+    along it, and lines shorter than a dash get one dash as long as they are. Lines of zero length are skipped.
+
+    Args:
+        starts (np.ndarray): (M, 3) array of where each line starts.
+        vectors (np.ndarray): (M, 3) array of the vector from the start of each line to its end.
+        radius (Real): Radius of the dashes.
+        dash_length (Real): Length of each dash.
+        gap_length (Real): Length of the gaps between dashes.
+        num_vertices (int): Number of vertices around each dash.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (V, 3) array of vertices, flat array of the vertex indices of
+                                                   each face, and the size of each face.
+    """
+    lengths = np.linalg.norm(vectors, axis=1)
+    starts, vectors, lengths = starts[lengths > 0], vectors[lengths > 0], lengths[lengths > 0]
+    directions = vectors / lengths[:, None]
+    period = dash_length + gap_length
+    num_dashes = np.maximum(1, np.floor((lengths + gap_length) / period)).astype(int)
+    dash_lengths = np.minimum(lengths, dash_length)
+    margins = (lengths - num_dashes * dash_lengths - (num_dashes - 1) * gap_length) / 2
+
+    # One row per dash, with its line and its position along that line
+    line = np.repeat(np.arange(len(lengths)), num_dashes)
+    dash_number = np.arange(len(line)) - np.repeat(np.cumsum(num_dashes) - num_dashes, num_dashes)
+    along = margins[line] + dash_number * period + dash_lengths[line] / 2
+    centers = starts[line] + along[:, None] * directions[line]
+
+    # Rotate each dash from the Z axis onto its line
+    z_axes = directions[line]
+    helpers = np.where(np.abs(z_axes[:, [2]]) < 0.9, [[0, 0, 1]], [[1, 0, 0]])
+    x_axes = np.cross(helpers, z_axes)
+    x_axes /= np.linalg.norm(x_axes, axis=1, keepdims=True)
+    y_axes = np.cross(z_axes, x_axes)
+    rotations = np.stack([x_axes, y_axes, z_axes], axis=1)
+
+    local = frustum_vertices(radius, radius, dash_lengths[line], num_vertices)
+    vertices = np.einsum("dvi,dij->dvj", local, rotations) + centers[:, None, :]
+
+    faces, face_sizes = frustum_faces(num_vertices)
+    offsets = np.arange(len(line)) * local.shape[1]
+    all_faces = (faces[None, :] + offsets[:, None]).ravel()
+    all_face_sizes = np.tile(face_sizes, len(line))
+    return vertices.reshape(-1, 3), all_faces, all_face_sizes
@@ -0,0 +1,152 @@
+"""
+Estimates how heavy each imported chemical is to render, so that expensive imports can be spotted before a render.
+"""
+from __future__ import annotations
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+import bpy
+
+# Prefix of the collections chemicals are imported into
+CHEMICAL_COLLECTION_PREFIX = "Chemical Structure: "
+
+# Rough number of bytes Blender keeps per element of a mesh, used to estimate memory
+VERTEX_BYTES = 32
+EDGE_BYTES = 16
+LOOP_BYTES = 8
+POLYGON_BYTES = 16
+
+# Footprints from the last refresh, keyed by collection name. Drawing the panel only reads from here.
+_cached_footprints: Dict[str, Footprint] = {}
+
+
+class Footprint:
+    """
+    Resource usage of a collection of objects.
+
+    Attributes:
+        objects (int): Number of objects in the collection, including its children.
+        vertices (int): Number of vertices that get rendered, counting every instance.
+        triangles (int): Number of triangles that get rendered, counting every instance, after modifiers.
+        materials (int): Number of distinct materials used.
+        mesh_bytes (int): Estimate of the memory taken by the mesh data, counting shared data once.
+    """
+
+    def __init__(self):
+        self.objects = 0
+        self.vertices = 0
+        self.triangles = 0
+        self.materials = 0
+        self.mesh_bytes = 0
+
+    def __repr__(self):
+        return (f"Footprint of {self.objects} objects, {self.vertices} vertices, {self.triangles} triangles, "
+                f"{self.materials} materials, {self.mesh_bytes / 2 ** 20:.1f} MiB of meshes")
+
+
+def measure_mesh(mesh: bpy.types.Mesh) -> Tuple[int, int, int]:
+    """Counts the vertices and triangles in a mesh, and estimates its memory, using bulk reads.
+
+    Args:
+        mesh (bpy.types.Mesh): Mesh to measure.
+
+    Returns:
+        Tuple[int, int, int]: Number of vertices, number of triangles, and estimated size in bytes.
+    """
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    triangles = int((loop_totals - 2).sum())
+    mesh_bytes = (len(mesh.vertices) * VERTEX_BYTES + len(mesh.edges) * EDGE_BYTES
+                  + len(mesh.loops) * LOOP_BYTES + len(mesh.polygons) * POLYGON_BYTES)
+    return len(mesh.vertices), triangles, mesh_bytes
+
+
+def collection_footprint(collection: bpy.types.Collection, depsgraph: bpy.types.Depsgraph) -> Footprint:
+    """Measures a collection. Each datablock is measured once, however many objects share it, so instanced
+    atoms and bonds cost one measurement per element or element pair. Objects that aren't plain meshes
+    (NURBS spheres, curves) or that have modifiers are measured after evaluation.
+
+    Args:
+        collection (bpy.types.Collection): Collection to measure, along with its children.
+        depsgraph (bpy.types.Depsgraph): Evaluated dependency graph, used for non-mesh objects.
+
+    Returns:
+        Footprint: The collection's footprint.
+    """
+    measurements: Dict[str, Tuple[int, int, int]] = {}
+    materials = set()
+
+    def measure(blender_object: bpy.types.Object) -> Tuple[int, int, int]:
+        key = f"{type(blender_object.data).__name__}:{blender_object.data.name}"
+        if key not in measurements:
+            if blender_object.type == "MESH" and not blender_object.modifiers:
+                measurements[key] = measure_mesh(blender_object.data)
+            else:
+                evaluated = blender_object.evaluated_get(depsgraph)
+                measurements[key] = measure_mesh(evaluated.to_mesh())
+                evaluated.to_mesh_clear()
+            materials.update(material.name for material in blender_object.data.materials if material)
+        return measurements[key]
+
+    footprint = Footprint()
+    objects = [blender_object for blender_object in collection.all_objects if blender_object.data is not None]
+    footprint.objects = len(collection.all_objects)
+    for blender_object in objects:
+        if blender_object.active_material is not None:
+            materials.add(blender_object.active_material.name)
+        vertices, triangles, _ = measure(blender_object)
+        if blender_object.hide_render:
+            # Instance sources are hidden, and only get rendered through their parent's vertices
+            continue
+        if blender_object.instance_type == "VERTS" and blender_object.children:
+            for instance in blender_object.children:
+                instance_vertices, instance_triangles, _ = measure(instance)
+                footprint.vertices += vertices * instance_vertices
+                footprint.triangles += vertices * instance_triangles
+        else:
+            footprint.vertices += vertices
+            footprint.triangles += triangles
+
+    footprint.materials = len(materials)
+    footprint.mesh_bytes = sum(mesh_bytes for _, _, mesh_bytes in measurements.values())
+    return footprint
+
+
+def refresh_footprints(context: bpy.types.Context) -> Dict[str, Footprint]:
+    """Measures every chemical collection in the scene, and caches the results.
+
+    Args:
+        context (bpy.types.Context): Blender's current context.
+
+    Returns:
+        Dict[str, Footprint]: Footprint of each chemical, keyed by collection name.
+    """
+    depsgraph = context.evaluated_depsgraph_get()
+    _cached_footprints.clear()
+    for collection in _walk_collections(context.scene.collection):
+        if collection.name.startswith(CHEMICAL_COLLECTION_PREFIX):
+            _cached_footprints[collection.name] = collection_footprint(collection, depsgraph)
+    return _cached_footprints
+
+
+def cached_footprints() -> Dict[str, Footprint]:
+    """Footprints from the last call to refresh_footprints. Cheap enough to call when drawing the UI.
+
+    Returns:
+        Dict[str, Footprint]: Footprint of each chemical, keyed by collection name.
+    """
+    return _cached_footprints
+
+
+def _walk_collections(collection: bpy.types.Collection) -> Iterator[bpy.types.Collection]:
+    """Yields every collection nested under a collection, depth-first.
+
+    Args:
+        collection (bpy.types.Collection): Collection to start from. It isn't yielded itself.
+
+    Yields:
+        bpy.types.Collection: The nested collections.
+    """
+    for child in collection.children:
+        yield child
+        yield from _walk_collections(child)
@@ -13,6 +13,29 @@ if typing.TYPE_CHECKING:
 from utils import PACKAGE_PREFIX
 GENERIC_CHEMICAL_ID = "Generic"
 METALS = [3, 4, 11, 12, 13] + [*range(19, 31 + 1)] + [*range(37, 50 + 1)] + [*range(55, 83 + 1)] + [*range(87, 116 + 1)]
+# Distinct colors for chains, cycled through if there are more chains than colors
+CHAIN_COLORS = (
+    (0.122, 0.467, 0.706, 1.0),
+    (1.000, 0.498, 0.055, 1.0),
+    (0.173, 0.627, 0.173, 1.0),
+    (0.839, 0.153, 0.157, 1.0),
+    (0.580, 0.404, 0.741, 1.0),
+    (0.549, 0.337, 0.294, 1.0),
+    (0.890, 0.467, 0.761, 1.0),
+    (0.498, 0.498, 0.498, 1.0),
+    (0.737, 0.741, 0.133, 1.0),
+    (0.090, 0.745, 0.812, 1.0),
+)
+# Colors of isosurfaces at positive and negative isovalues, such as the two phases of an orbital
+ISOSURFACE_COLORS = {
+    True: (0.122, 0.467, 0.706, 1.0),
+    False: (0.839, 0.153, 0.157, 1.0),
+}
+# Colors of the dashes drawn for each kind of non-covalent contact
+CONTACT_COLORS = {
+    "HYDROGEN_BONDS": (0.090, 0.745, 0.812, 1.0),
+    "CLOSE_CONTACTS": (1.000, 0.498, 0.055, 1.0),
+}
 BSDF_SHADER_INPUTS = {
     "Base Color": 0,
     "Subsurface": 1,
@@ -74,6 +97,95 @@ class MaterialFactory:
             material = self._create_material(symbol, key)
         return material
 
+    def get_chain_material(self, chain: int, chemical_id: str = GENERIC_CHEMICAL_ID) -> bpy.types.Material:
+        """Gets the material for a chain of a biomolecule, making it if it has not been made yet.
+        Chains are colored by cycling through CHAIN_COLORS.
+
+        Args:
+            chain (int): Index of the chain.
+            chemical_id (str): A unique identifier for a material.
+
+        Returns:
+            bpy.types.Material: A material for the given chain.
+        """
+        color_index = chain % len(CHAIN_COLORS)
+        key = self._get_material_key(chemical_id, f"chain_{color_index}")
+        material = bpy.data.materials.get(key)
+        if material is None:
+            material = bpy.data.materials.new(key)
+            material.use_nodes = True
+            shader: bpy.types.ShaderNodeBsdfPrincipled = material.node_tree.nodes.get('Principled BSDF')
+            shader.inputs[BSDF_SHADER_INPUTS["Base Color"]].default_value = CHAIN_COLORS[color_index]
+            shader.inputs[BSDF_SHADER_INPUTS["Roughness"]].default_value = 0.5
+        return material
+
+    def get_isosurface_material(self, positive: bool, chemical_id: str = GENERIC_CHEMICAL_ID) -> bpy.types.Material:
+        """Gets the material for an isosurface of volumetric data, making it if it has not been made yet.
+        Surfaces are partly transparent, so that the atoms inside them stay visible.
+
+        Args:
+            positive (bool): Whether the isovalue is positive.
+            chemical_id (str): A unique identifier for a material.
+
+        Returns:
+            bpy.types.Material: A material for isosurfaces of the given sign.
+        """
+        key = self._get_material_key(chemical_id, f"isosurface_{'positive' if positive else 'negative'}")
+        material = bpy.data.materials.get(key)
+        if material is None:
+            material = bpy.data.materials.new(key)
+            material.use_nodes = True
+            material.blend_method = "BLEND"
+            shader: bpy.types.ShaderNodeBsdfPrincipled = material.node_tree.nodes.get('Principled BSDF')
+            shader.inputs[BSDF_SHADER_INPUTS["Base Color"]].default_value = ISOSURFACE_COLORS[positive]
+            shader.inputs[BSDF_SHADER_INPUTS["Roughness"]].default_value = 0.3
+            shader.inputs[BSDF_SHADER_INPUTS["Alpha"]].default_value = 0.6
+        return material
+
+    def get_polyhedron_material(self, symbol: str, chemical_id: str = GENERIC_CHEMICAL_ID) -> bpy.types.Material:
+        """Gets the material for coordination polyhedra around an element, making it if it has not been made yet.
+        Polyhedra take the element's JMol color, and are partly transparent so that their contents stay visible.
+
+        Args:
+            symbol (str): Chemical symbol of the central element.
+            chemical_id (str): A unique identifier for a material.
+
+        Returns:
+            bpy.types.Material: A material for polyhedra around the given element.
+        """
+        key = self._get_material_key(chemical_id, f"polyhedron_{symbol}")
+        material = bpy.data.materials.get(key)
+        if material is None:
+            color = [*ase.data.colors.jmol_colors[ase.data.atomic_numbers[symbol]], 1.0]
+            material = bpy.data.materials.new(key)
+            material.use_nodes = True
+            material.blend_method = "BLEND"
+            shader: bpy.types.ShaderNodeBsdfPrincipled = material.node_tree.nodes.get('Principled BSDF')
+            shader.inputs[BSDF_SHADER_INPUTS["Base Color"]].default_value = color
+            shader.inputs[BSDF_SHADER_INPUTS["Roughness"]].default_value = 0.4
+            shader.inputs[BSDF_SHADER_INPUTS["Alpha"]].default_value = 0.5
+        return material
+
+    def get_contact_material(self, kind: str, chemical_id: str = GENERIC_CHEMICAL_ID) -> bpy.types.Material:
+        """Gets the material for a kind of non-covalent contact, making it if it has not been made yet.
+
+        Args:
+            kind (str): Kind of contact, one of the keys of CONTACT_COLORS.
+            chemical_id (str): A unique identifier for a material.
+
+        Returns:
+            bpy.types.Material: A material for the given kind of contact.
+        """
+        key = self._get_material_key(chemical_id, f"contact_{kind.lower()}")
+        material = bpy.data.materials.get(key)
+        if material is None:
+            material = bpy.data.materials.new(key)
+            material.use_nodes = True
+            shader: bpy.types.ShaderNodeBsdfPrincipled = material.node_tree.nodes.get('Principled BSDF')
+            shader.inputs[BSDF_SHADER_INPUTS["Base Color"]].default_value = CONTACT_COLORS[kind]
+            shader.inputs[BSDF_SHADER_INPUTS["Roughness"]].default_value = 0.5
+        return material
+
     def _get_material_key(self, chemical_id: str, symbol: str) -> str:
         """Creates a unique human-readable key for a material
 
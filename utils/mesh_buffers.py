@@ -0,0 +1,76 @@
+"""
+Helpers for writing numpy arrays straight into Blender mesh buffers.
+Going through foreach_set avoids building Python lists of vertices and faces, which matters once
+a structure has more than a few thousand atoms or bonds.
+"""
+from typing import Optional
+
+import numpy as np
+
+import bpy
+
+
+def fill_mesh(mesh: bpy.types.Mesh,
+              vertices: np.ndarray,
+              faces: Optional[np.ndarray] = None,
+              face_sizes: Optional[np.ndarray] = None,
+              edges: Optional[np.ndarray] = None,
+              smooth: bool = False) -> bpy.types.Mesh:
+    """Replaces the geometry of a mesh with the given arrays, without validation.
+
+    Args:
+        mesh (bpy.types.Mesh): Mesh to be filled. Any existing geometry is cleared.
+        vertices (np.ndarray): (N, 3) array of vertex coordinates.
+        faces (np.ndarray, optional): Either an (M, K) array of vertex indices for M faces with K corners each,
+                                      or a flat array of vertex indices if face_sizes is given.
+        face_sizes (np.ndarray, optional): Number of corners of each face, for meshes mixing face sizes.
+        edges (np.ndarray, optional): (E, 2) array of vertex indices for loose edges.
+        smooth (bool, optional): Whether the faces should be shaded smooth. Defaults to False.
+
+    Returns:
+        bpy.types.Mesh: The mesh that was filled.
+    """
+    mesh.clear_geometry()
+
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+    mesh.vertices.add(len(vertices))
+    mesh.vertices.foreach_set("co", vertices.ravel())
+
+    if edges is not None and len(edges) > 0:
+        edges = np.ascontiguousarray(edges, dtype=np.int32).reshape(-1, 2)
+        mesh.edges.add(len(edges))
+        mesh.edges.foreach_set("vertices", edges.ravel())
+
+    if faces is not None and len(faces) > 0:
+        faces = np.asarray(faces, dtype=np.int32)
+        if face_sizes is None:
+            face_sizes = np.full(len(faces), faces.shape[1], dtype=np.int32)
+        face_sizes = np.asarray(face_sizes, dtype=np.int32)
+        loop_starts = np.zeros(len(face_sizes), dtype=np.int32)
+        np.cumsum(face_sizes[:-1], out=loop_starts[1:])
+
+        mesh.loops.add(int(face_sizes.sum()))
+        mesh.loops.foreach_set("vertex_index", faces.ravel())
+        mesh.polygons.add(len(face_sizes))
+        mesh.polygons.foreach_set("loop_start", loop_starts)
+        mesh.polygons.foreach_set("loop_total", face_sizes)
+        if smooth:
+            mesh.polygons.foreach_set("use_smooth", np.ones(len(face_sizes), dtype=bool))
+
+    mesh.update(calc_edges=faces is not None)
+    return mesh
+
+
+def set_vertex_positions(mesh: bpy.types.Mesh, vertices: np.ndarray) -> bpy.types.Mesh:
+    """Overwrites the coordinates of a mesh's vertices in place, keeping its topology.
+
+    Args:
+        mesh (bpy.types.Mesh): Mesh whose vertices will be moved.
+        vertices (np.ndarray): (N, 3) array of coordinates. N must match the mesh's vertex count.
+
+    Returns:
+        bpy.types.Mesh: The mesh that was updated.
+    """
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(vertices, dtype=np.float32).ravel())
+    mesh.update()
+    return mesh
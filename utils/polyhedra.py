@@ -0,0 +1,208 @@
+"""
+Coordination polyhedra, drawn around the atoms of chosen central elements from the shell of atoms bonded to them.
+"""
+from __future__ import annotations
+import itertools
+from typing import Dict, List, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+import scipy.sparse
+import ase
+import ase.data
+import ase.neighborlist
+import bpy
+
+if TYPE_CHECKING:
+    from chemical import Chemical
+from utils.mesh_buffers import fill_mesh
+
+# Skin ASE's NeighborList adds to each atom's natural cutoff, and so to the bonds in a BondBag
+NEIGHBORLIST_SKIN = 0.3
+
+# Size of the deterministic jitter applied to the corners before finding hulls, relative to the shell's radius.
+# Without it, coplanar corners (the square faces of an octahedron) would give overlapping triangles.
+JOGGLE = 1e-6
+
+# Approximate number of point-to-triangle heights computed at a time while finding hulls
+HULL_CHUNK = 2 ** 20
+
+
+class CoordinationPolyhedra:
+    """
+    Polyhedra drawn around every atom of some central elements, with the atoms bonded to it as corners.
+    Sites with the same number of corners have their convex hulls found together, in one array operation,
+    and every polyhedron around one element is written into a single mesh.
+
+    Attributes:
+        central_elements (Tuple[str]): Chemical symbols of the atoms at the center of the polyhedra.
+        ligand_elements (Tuple[str]): Chemical symbols of the atoms that can be corners. If empty, any can.
+        min_coordination (int): Sites with fewer corners than this are skipped.
+    """
+
+    def __init__(self, central_elements: Sequence[str],
+                 ligand_elements: Sequence[str] = (),
+                 min_coordination: int = 4):
+        """
+        Init for the coordination polyhedra.
+
+        Args:
+            central_elements (Sequence[str]): Chemical symbols of the atoms at the center of the polyhedra.
+            ligand_elements (Sequence[str], optional): Chemical symbols of the atoms that can be corners.
+                                                       Defaults to any element.
+            min_coordination (int, optional): Sites with fewer corners than this are skipped. Defaults to 4.
+
+        Raises:
+            ValueError: If one of the chemical symbols isn't an element, or min_coordination is below 3.
+        """
+        for symbol in (*central_elements, *ligand_elements):
+            if symbol not in ase.data.atomic_numbers:
+                raise ValueError(f"'{symbol}' is not a chemical symbol")
+        if min_coordination < 3:
+            raise ValueError("Polyhedra need at least 3 corners")
+        self.central_elements = tuple(central_elements)
+        self.ligand_elements = tuple(ligand_elements)
+        self.min_coordination = min_coordination
+
+    def __repr__(self):
+        return f"CoordinationPolyhedra around {', '.join(self.central_elements)}"
+
+    # ======
+    # Public
+    # ======
+
+    def shells(self, atoms: ase.Atoms, adjacency_matrix: scipy.sparse.spmatrix) -> Tuple[np.ndarray, np.ndarray]:
+        """Finds the atoms bonded to each central atom. Periodic images are kept apart, so a small cell can put
+        two images of the same atom on one shell.
+
+        Args:
+            atoms (ase.Atoms): The structure.
+            adjacency_matrix (scipy.sparse.spmatrix): Bonds between the atoms, such as BondBag.adjacency_matrix.
+                                                      Only one triangle needs to be filled in.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Index of the central atom of each corner, and the (M, 3) position of
+                                           each corner relative to its central atom.
+        """
+        is_central = np.isin(atoms.numbers, [ase.data.atomic_numbers[symbol] for symbol in self.central_elements])
+        radii = np.array(ase.neighborlist.natural_cutoffs(atoms)) + NEIGHBORLIST_SKIN
+        centers, corners, displacements = ase.neighborlist.neighbor_list("ijD", atoms, radii,
+                                                                         self_interaction=False)
+
+        keep = is_central[centers]
+        if self.ligand_elements:
+            ligand_numbers = [ase.data.atomic_numbers[symbol] for symbol in self.ligand_elements]
+            keep &= np.isin(atoms.numbers[corners], ligand_numbers)
+        adjacency = scipy.sparse.csr_matrix(adjacency_matrix)
+        adjacency = adjacency + adjacency.T
+        keep[keep] = np.asarray(adjacency[centers[keep], corners[keep]]).ravel() > 0
+        return centers[keep], displacements[keep]
+
+    def polyhedra(self, atoms: ase.Atoms,
+                  adjacency_matrix: scipy.sparse.spmatrix) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Builds the polyhedra around each central element.
+
+        Args:
+            atoms (ase.Atoms): The structure.
+            adjacency_matrix (scipy.sparse.spmatrix): Bonds between the atoms, such as BondBag.adjacency_matrix.
+
+        Returns:
+            Dict[str, Tuple[np.ndarray, np.ndarray]]: For each central element with at least one polyhedron,
+                                                      a (V, 3) array of corner positions and an (F, 3) array
+                                                      of outward-facing triangles.
+        """
+        centers, displacements = self.shells(atoms, adjacency_matrix)
+        order = np.argsort(centers, kind="stable")
+        centers, displacements = centers[order], displacements[order]
+        sites, starts, coordinations = np.unique(centers, return_index=True, return_counts=True)
+
+        symbols = np.array(atoms.get_chemical_symbols())
+        vertices: Dict[str, List[np.ndarray]] = {}
+        faces: Dict[str, List[np.ndarray]] = {}
+        num_vertices: Dict[str, int] = {}
+        for coordination in np.unique(coordinations[coordinations >= self.min_coordination]):
+            has_coordination = coordinations == coordination
+            group_sites = sites[has_coordination]
+            corner_indices = starts[has_coordination][:, None] + np.arange(coordination)
+            shell = displacements[corner_indices]
+            site_of_face, local_faces = convex_hulls(shell)
+
+            for symbol in np.unique(symbols[group_sites]):
+                is_element = symbols[group_sites] == symbol
+                positions = shell[is_element] + atoms.positions[group_sites[is_element]][:, None, :]
+                # Number the element's sites within this group, to offset their faces into the element's mesh
+                site_number = np.cumsum(is_element) - 1
+                element_faces = is_element[site_of_face]
+                offset = num_vertices.get(symbol, 0)
+                vertices.setdefault(symbol, []).append(positions.reshape(-1, 3))
+                faces.setdefault(symbol, []).append(local_faces[element_faces]
+                                                    + (site_number[site_of_face[element_faces]] * coordination
+                                                       + offset)[:, None])
+                num_vertices[symbol] = offset + len(positions) * coordination
+
+        return {symbol: (np.concatenate(vertices[symbol]), np.concatenate(faces[symbol])) for symbol in vertices}
+
+    def spawn(self, chemical: Chemical, material_factory=None) -> List[bpy.types.Object]:
+        """Adds the polyhedra of a chemical to its collection, as one object per central element.
+
+        Args:
+            chemical (Chemical): Chemical to draw polyhedra in. It must already be in the scene.
+            material_factory (MaterialFactory, optional): Source of the materials, shared by each element's
+                                                          polyhedra. If None, they get no material.
+
+        Returns:
+            List[bpy.types.Object]: The new objects.
+        """
+        objects = []
+        for symbol, (vertices, faces) in self.polyhedra(chemical.atoms, chemical.bonds.adjacency_matrix).items():
+            name = f"Polyhedra_{symbol}_{chemical.collection_name}"
+            mesh = fill_mesh(bpy.data.meshes.new(name), vertices, faces=faces)
+            if material_factory is not None:
+                mesh.materials.append(material_factory.get_polyhedron_material(symbol, chemical.name))
+            polyhedra = bpy.data.objects.new(name, mesh)
+            polyhedra.location = chemical.origin
+            chemical.collection.objects.link(polyhedra)
+            objects.append(polyhedra)
+        return objects
+
+
+def convex_hulls(shells: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Finds the convex hulls of many small sets of points with the same size at once. Every triangle between
+    three points of a set is tried, and kept if all of the set's other points lie on one side of it.
+    This is quadratic in the number of points per set, which is fine for coordination shells.
+
+    Args:
+        shells (np.ndarray): (S, K) array of K points each for S sets, with K of at least 3.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Index of the set each triangle belongs to, and (F, 3) array of the
+                                       triangles, as indices of points within their set. Triangles face outwards.
+    """
+    num_shells, num_points, _ = shells.shape
+    triangles = np.array(list(itertools.combinations(range(num_points), 3)))
+    is_corner = np.zeros((len(triangles), num_points), dtype=bool)
+    is_corner[np.arange(len(triangles))[:, None], triangles] = True
+
+    # Jitter the points so no four are coplanar, which makes every hull a proper triangulation
+    scale = np.abs(shells).max(axis=(1, 2), keepdims=True)
+    jitter = np.random.default_rng(0).uniform(-1, 1, size=(num_points, 3))
+    points = shells + JOGGLE * scale * jitter
+
+    shell_indices, faces = [], []
+    chunk_size = max(1, HULL_CHUNK // (len(triangles) * num_points))
+    for start in range(0, num_shells, chunk_size):
+        chunk = points[start:start + chunk_size]
+        first, second, third = (chunk[:, triangles[:, corner]] for corner in range(3))
+        normals = np.cross(second - first, third - first)
+        heights = np.einsum("sckj,scj->sck", chunk[:, None, :, :] - first[:, :, None, :], normals)
+        heights[:, is_corner] = 0
+        is_below = np.all(heights <= 0, axis=2)
+        is_above = np.all(heights >= 0, axis=2)
+
+        shell_index, triangle_index = np.nonzero(is_below | is_above)
+        chunk_faces = triangles[triangle_index]
+        # The other points must end up behind each face, so faces with the points above them are flipped
+        is_flipped = is_above[shell_index, triangle_index] & ~is_below[shell_index, triangle_index]
+        chunk_faces[is_flipped] = chunk_faces[is_flipped][:, ::-1]
+        shell_indices.append(shell_index + start)
+        faces.append(chunk_faces)
+    return np.concatenate(shell_indices), np.concatenate(faces)
@@ -0,0 +1,175 @@
+"""
+Spatial index over atomic positions, used for selecting atoms by region on large systems.
+"""
+from __future__ import annotations
+from numbers import Real
+from typing import Sequence, Tuple
+
+import numpy as np
+import scipy.spatial
+import ase.cell
+
+# Cells whose opposite faces are closer than this, in Angstrom, are placeholders rather than crystals.
+# PDB files often carry a "CRYST1 1.000 1.000 1.000" record, which ASE reads as a periodic 1 Angstrom cell.
+MIN_PERIODIC_SPACING = 1.5
+
+
+class SpatialIndex:
+    """
+    A k-d tree over a set of atomic positions. Periodic boundary conditions are handled by padding the
+    tree with the periodic images of atoms that lie within a certain distance of the cell's faces. The
+    padding grows on demand if a query reaches further than it. Directions whose faces are closer together
+    than MIN_PERIODIC_SPACING are treated as non-periodic, as padding them would take thousands of images.
+    Building the tree is deferred until the first query.
+    """
+
+    def __init__(self, positions: np.ndarray,
+                 cell: np.ndarray = None,
+                 pbc: Sequence[bool] = (False, False, False),
+                 padding: Real = 8.0):
+        """
+        Init for the spatial index.
+
+        Args:
+            positions (np.ndarray): (N, 3) array of atomic positions.
+            cell (np.ndarray, optional): 3x3 array of cell vectors. Only used if some of pbc is True.
+            pbc (Sequence[bool], optional): Periodicity along each cell vector. Defaults to non-periodic.
+            padding (Real, optional): Initial distance, in Angstrom, up to which periodic images are indexed.
+        """
+        self.positions = np.asarray(positions, dtype=float)
+        self.cell = ase.cell.Cell.new(np.zeros((3, 3)) if cell is None else cell)
+        self.pbc = np.asarray(pbc, dtype=bool) & (self.cell.lengths() > 0)
+        if self.is_periodic:
+            self.cell = self.cell.complete()
+            spacings = 1 / np.linalg.norm(self.cell.reciprocal(), axis=1)
+            self.pbc &= spacings >= MIN_PERIODIC_SPACING
+
+        self._padding = padding
+        self._tree = None
+        self._owners = None
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __repr__(self):
+        return f"SpatialIndex over {len(self)} positions"
+
+    @property
+    def is_periodic(self) -> bool:
+        """Whether the index accounts for periodic images."""
+        return bool(self.pbc.any())
+
+    # ======
+    # Public
+    # ======
+
+    def within_radius(self, points: np.ndarray, radius: Real) -> np.ndarray:
+        """Finds all atoms within some distance of one or more points.
+
+        Args:
+            points (np.ndarray): A point of shape (3,), or an (M, 3) array of points.
+            radius (Real): Search radius, in Angstrom.
+
+        Returns:
+            np.ndarray: Sorted indices of every atom within the radius of any of the points.
+        """
+        tree = self.__tree_covering(radius)
+        points = self.__wrap(np.atleast_2d(points))
+        if len(tree.data) == 0:
+            return np.array([], dtype=int)
+        neighbors = tree.query_ball_point(points, radius, return_sorted=False)
+        flat = np.concatenate([np.asarray(hits, dtype=int) for hits in neighbors])
+        return np.unique(self._owners[flat])
+
+    def nearest(self, points: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Finds the k nearest atoms to one or more points.
+
+        Args:
+            points (np.ndarray): A point of shape (3,), or an (M, 3) array of points.
+            k (int, optional): Number of neighbors to find for each point. Defaults to 1.
+
+        Note:
+            For periodic systems that are small compared to the search, an atom may be returned more than
+            once, as several of its periodic images can be among the nearest.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (M, k) arrays with the distances and indices of the nearest atoms.
+        """
+        points = self.__wrap(np.atleast_2d(points))
+        tree = self.__tree_covering(self._padding)
+        k = min(k, len(tree.data))
+        distances, hits = tree.query(points, k=[*range(1, k + 1)])
+        while self.is_periodic and np.max(distances) > self._padding:
+            # An image outside of the padding might be closer than what we found
+            tree = self.__tree_covering(np.max(distances))
+            distances, hits = tree.query(points, k=[*range(1, k + 1)])
+        return distances, self._owners[hits]
+
+    def within_box(self, lower: Sequence[Real], upper: Sequence[Real]) -> np.ndarray:
+        """Finds all atoms inside an axis-aligned box. Periodic images are not considered.
+
+        Args:
+            lower (Sequence[Real]): Corner of the box with the smallest coordinates.
+            upper (Sequence[Real]): Corner of the box with the largest coordinates.
+
+        Returns:
+            np.ndarray: Sorted indices of every atom inside the box.
+        """
+        inside = np.all((self.positions >= lower) & (self.positions <= upper), axis=1)
+        return np.flatnonzero(inside)
+
+    # =======
+    # Private
+    # =======
+
+    def __wrap(self, points: np.ndarray) -> np.ndarray:
+        """Wraps points back into the cell along the periodic directions.
+
+        Args:
+            points (np.ndarray): (M, 3) array of points.
+
+        Returns:
+            np.ndarray: The wrapped points.
+        """
+        if not self.is_periodic:
+            return points
+        scaled = self.cell.scaled_positions(points)
+        scaled[:, self.pbc] %= 1.0
+        return self.cell.cartesian_positions(scaled)
+
+    def __tree_covering(self, distance: Real) -> scipy.spatial.cKDTree:
+        """Returns a tree whose periodic padding is at least the given distance, building it if needed.
+
+        Args:
+            distance (Real): Distance, in Angstrom, that the periodic padding must cover.
+
+        Returns:
+            scipy.spatial.cKDTree: The tree.
+        """
+        if self._tree is not None and (not self.is_periodic or distance <= self._padding):
+            return self._tree
+        self._padding = max(self._padding, distance)
+
+        if not self.is_periodic:
+            self._tree = scipy.spatial.cKDTree(self.positions, balanced_tree=False, compact_nodes=False)
+            self._owners = np.arange(len(self.positions))
+            return self._tree
+
+        scaled = self.cell.scaled_positions(self.positions)
+        scaled[:, self.pbc] %= 1.0
+
+        # Padding along each cell vector, as a fraction of the distance between opposite faces
+        padding = np.where(self.pbc, self._padding * np.linalg.norm(self.cell.reciprocal(), axis=1), 0)
+        reach = np.ceil(padding).astype(int)
+        shifts = np.stack(np.meshgrid(*[np.arange(-r, r + 1) for r in reach], indexing="ij"), axis=-1).reshape(-1, 3)
+
+        image_positions, owners = [], []
+        for shift in shifts:
+            shifted = scaled + shift
+            keep = np.all((shifted >= -padding) & (shifted <= 1 + padding), axis=1)
+            image_positions.append(self.cell.cartesian_positions(shifted[keep]))
+            owners.append(np.flatnonzero(keep))
+
+        self._tree = scipy.spatial.cKDTree(np.concatenate(image_positions), balanced_tree=False, compact_nodes=False)
+        self._owners = np.concatenate(owners)
+        return self._tree
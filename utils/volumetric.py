@@ -0,0 +1,541 @@
+"""
+Volumetric data (electron densities, orbitals, potentials) read from grid-based files, and isosurfaces drawn from it.
+"""
+from __future__ import annotations
+import hashlib
+import io
+import itertools
+import os
+import tempfile
+import time
+import warnings
+from numbers import Real
+from typing import IO, List, Tuple
+
+import numpy as np
+import ase
+import ase.io
+import ase.units
+import bpy
+
+from utils.mesh_buffers import fill_mesh
+
+# Grids are parsed once into .npy files here, then memory-mapped on every later import of the same file
+CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), "hydridic_grids")
+
+# Cached grids unused for longer than this (in seconds) are removed, as are the least recently used ones
+# once the cache grows past its size limit (in bytes)
+CACHE_MAX_AGE = 7 * 24 * 60 * 60
+CACHE_MAX_BYTES = 4 * 2 ** 30
+
+# Approximate number of characters parsed at a time while streaming a grid from a text file
+CHUNK_CHARACTERS = 2 ** 24
+
+# Approximate number of grid points held in memory at a time while building an isosurface
+SLAB_POINTS = 2 ** 20
+
+# The six tetrahedra each grid cell is split into, as indices of the cell's corners (bit 0 is x, 1 is y, 2 is z).
+# Each one follows a path from the lowest to the highest corner, adding one axis at a time, so that the faces of
+# neighbouring cells are split the same way and the surface has no cracks.
+CELL_TETRAHEDRA = np.array([
+    [0, 1 << first, (1 << first) | (1 << second), 7]
+    for first, second in itertools.permutations(range(3), 2)
+])
+CELL_CORNERS = np.array([[corner & 1, (corner >> 1) & 1, (corner >> 2) & 1] for corner in range(8)])
+
+
+def _tetrahedron_edges() -> np.ndarray:
+    """Builds the marching tetrahedra lookup table. Corners above the isovalue are "inside". For each of the
+    16 inside/outside cases, up to two triangles cross the tetrahedron, each with one vertex on an edge.
+
+    Returns:
+        np.ndarray: (16, 2, 3, 2) array of the corners at either end of the edge each triangle vertex is on,
+                    or -1 where a case has fewer than two triangles.
+    """
+    table = np.full((16, 2, 3, 2), -1)
+    for case in range(16):
+        inside = [corner for corner in range(4) if case >> corner & 1]
+        outside = [corner for corner in range(4) if not case >> corner & 1]
+        if len(inside) in (1, 3):
+            lone, others = (inside[0], outside) if len(inside) == 1 else (outside[0], inside)
+            table[case, 0] = [(lone, other) for other in others]
+        elif len(inside) == 2:
+            (a, b), (c, d) = inside, outside
+            table[case, 0] = [(a, c), (a, d), (b, d)]
+            table[case, 1] = [(a, c), (b, d), (b, c)]
+    return table
+
+
+TETRAHEDRON_EDGES = _tetrahedron_edges()
+
+
+class VolumetricGrid:
+    """
+    Values sampled on a regular 3D grid, along with the structure they belong to. The values stay on disk in a
+    memory-mapped array, so only the parts being worked on at any time are read into memory.
+
+    Attributes:
+        atoms (ase.Atoms): The structure stored alongside the grid.
+        data (np.ndarray): (Nx, Ny, Nz) array of values, usually memory-mapped.
+        origin (np.ndarray): Position of the first grid point, in Angstrom.
+        axes (np.ndarray): (3, 3) array, where row i is the step between neighbouring grid points along axis i.
+        periodic (bool): Whether the grid wraps around, so that the points past the last one are the first ones.
+    """
+
+    def __init__(self, atoms: ase.Atoms, data: np.ndarray, origin: np.ndarray, axes: np.ndarray,
+                 periodic: bool = False):
+        """
+        Init for the volumetric grid.
+
+        Args:
+            atoms (ase.Atoms): The structure stored alongside the grid.
+            data (np.ndarray): (Nx, Ny, Nz) array of values.
+            origin (np.ndarray): Position of the first grid point, in Angstrom.
+            axes (np.ndarray): (3, 3) array of the steps between neighbouring grid points, in Angstrom.
+            periodic (bool, optional): Whether the grid wraps around. Defaults to False.
+        """
+        self.atoms = atoms
+        self.data = data
+        self.origin = np.asarray(origin, dtype=float)
+        self.axes = np.asarray(axes, dtype=float)
+        self.periodic = periodic
+
+    def __repr__(self):
+        return f"VolumetricGrid with {'x'.join(map(str, self.shape))} points"
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        """Number of grid points along each axis."""
+        return tuple(self.data.shape)
+
+    @classmethod
+    def from_file(cls, filepath: str, cache_directory: str = CACHE_DIRECTORY, orbital: int = 0) -> VolumetricGrid:
+        """
+        Reads a Gaussian cube file, or a VASP CHGCAR-style file (CHGCAR, PARCHG, LOCPOT, ELFCAR, AECCAR).
+        The values are streamed into a memory-mapped cache, which later reads of the same file reuse.
+        Old and least recently used grids are evicted from the cache once it's written to.
+
+        Args:
+            filepath (str): Path to the file.
+            cache_directory (str, optional): Where to keep the parsed grids. Defaults to the system's temp dir.
+            orbital (int, optional): Which orbital to read, counting from 0, for cube files that store several.
+                                     Defaults to the first one.
+
+        Raises:
+            ValueError: If the file isn't in a format with volumetric data, or doesn't have the orbital.
+
+        Returns:
+            VolumetricGrid: The grid, and the structure stored with it.
+        """
+        filename = os.path.basename(filepath).lower()
+        cache_path = _cache_path(filepath, cache_directory)
+        if filename.endswith((".cube", ".cub")):
+            grid = _read_cube(filepath, cache_path, orbital)
+        elif any(name in filename for name in ("chgcar", "parchg", "locpot", "elfcar", "aeccar")):
+            grid = _read_chgcar(filepath, cache_path)
+        else:
+            raise ValueError(f"Can't tell the volumetric format of {os.path.basename(filepath)}")
+        evict_cache(cache_directory, keep=cache_path)
+        return grid
+
+    # ======
+    # Public
+    # ======
+
+    def isosurface(self, level: Real, step: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Builds the surface where the values cross an isovalue, using marching tetrahedra. Every grid cell in a
+        slab of the grid is processed at once, and vertices shared between triangles are merged.
+        Normals point from the values above the isovalue towards those below it.
+
+        Args:
+            level (Real): The isovalue.
+            step (int, optional): Only every step-th grid point along each axis is used. Defaults to 1.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (V, 3) array of vertex positions in Angstrom, relative to the atoms'
+                                           frame, and (F, 3) array of triangles as vertex indices.
+        """
+        samples = [np.arange(0, size, step) for size in self.shape]
+        coordinates = [sample.astype(float) for sample in samples]
+        if self.periodic:
+            # The first points are repeated past the end, to close the surface across the boundary
+            samples = [np.append(sample, 0) for sample in samples]
+            coordinates = [np.append(coordinate, size) for coordinate, size in zip(coordinates, self.shape)]
+        sampled_shape = np.array([len(sample) for sample in samples])
+        if np.any(sampled_shape < 2):
+            return np.zeros((0, 3)), np.zeros((0, 3), dtype=int)
+
+        keys, positions, faces_flipped = [], [], []
+        slab_thickness = max(1, SLAB_POINTS // int(sampled_shape[1] * sampled_shape[2]))
+        for start in range(0, sampled_shape[0] - 1, slab_thickness):
+            stop = min(start + slab_thickness, sampled_shape[0] - 1)
+            values = np.asarray(self.data[np.ix_(samples[0][start:stop + 1], samples[1], samples[2])],
+                                dtype=np.float32)
+            slab_keys, slab_positions, slab_flipped = _march_slab(values, level, start, sampled_shape,
+                                                                  coordinates)
+            keys.append(slab_keys)
+            positions.append(slab_positions)
+            faces_flipped.append(slab_flipped)
+
+        keys = np.concatenate(keys)
+        if len(keys) == 0:
+            return np.zeros((0, 3)), np.zeros((0, 3), dtype=int)
+        _, first_index, vertex_of_key = np.unique(keys, return_index=True, return_inverse=True)
+        vertices = np.concatenate(positions)[first_index] @ self.axes + self.origin
+        faces = vertex_of_key.reshape(-1, 3)
+
+        is_flipped = np.concatenate(faces_flipped)
+        if np.linalg.det(self.axes) < 0:
+            is_flipped = ~is_flipped
+        faces[is_flipped] = faces[is_flipped][:, ::-1]
+        return vertices, faces
+
+
+def spawn_isosurface(grid: VolumetricGrid, level: Real, name: str, collection: bpy.types.Collection,
+                     step: int = 1, location=(0, 0, 0), material: bpy.types.Material = None,
+                     flip_normals: bool = False) -> bpy.types.Object:
+    """Builds an isosurface of a grid, and adds it to a collection as a single mesh filled in bulk.
+
+    Args:
+        grid (VolumetricGrid): Grid to draw the isosurface of.
+        level (Real): The isovalue.
+        name (str): Name for the new object and mesh.
+        collection (bpy.types.Collection): Collection the new object is linked to.
+        step (int, optional): Only every step-th grid point along each axis is used. Defaults to 1.
+        location (Tuple[Real, Real, Real], optional): Location of the object. Defaults to the world origin.
+        material (bpy.types.Material, optional): Material of the surface.
+        flip_normals (bool, optional): Whether normals point towards higher values, such as out of the negative
+                                       lobes of an orbital. Defaults to False.
+
+    Returns:
+        bpy.types.Object: The new object.
+    """
+    vertices, faces = grid.isosurface(level, step)
+    if flip_normals:
+        faces = faces[:, ::-1]
+    mesh = fill_mesh(bpy.data.meshes.new(name), vertices, faces=faces, smooth=True)
+    if material is not None:
+        mesh.materials.append(material)
+    isosurface = bpy.data.objects.new(name, mesh)
+    isosurface.location = location
+    collection.objects.link(isosurface)
+    return isosurface
+
+
+def _march_slab(values: np.ndarray, level: Real, start: int, sampled_shape: np.ndarray,
+                coordinates) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Runs marching tetrahedra over every cell of a slab of the grid at once.
+
+    Args:
+        values (np.ndarray): (A + 1, B, C) array of values, for the A layers of cells in the slab.
+        level (Real): The isovalue.
+        start (int): Index of the slab's first layer, among the sampled points along the first axis.
+        sampled_shape (np.ndarray): Number of sampled points along each axis, over the whole grid.
+        coordinates (List[np.ndarray]): Grid coordinate of each sampled point along each axis.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Key of the grid edge each triangle vertex lies on (shared
+                                                   vertices have the same key), position of each triangle vertex
+                                                   in grid coordinates, and whether each triangle must be flipped.
+    """
+    layers, rows, columns = values.shape[0] - 1, values.shape[1] - 1, values.shape[2] - 1
+    corner_values = np.stack([values[dx:dx + layers, dy:dy + rows, dz:dz + columns].reshape(-1)
+                              for dx, dy, dz in CELL_CORNERS], axis=1)
+    corner_inside = corner_values > level
+
+    # Only cells the surface goes through are processed any further
+    num_inside = corner_inside.sum(axis=1)
+    active = np.flatnonzero((num_inside > 0) & (num_inside < 8))
+    cell_index = np.stack(np.unravel_index(active, (layers, rows, columns)), axis=1)
+    cell_index[:, 0] += start
+    corner_values = corner_values[active]
+    corner_inside = corner_inside[active]
+
+    keys, positions, flipped = [np.zeros(0, dtype=np.int64)], [np.zeros((0, 3))], [np.zeros(0, dtype=bool)]
+    for tetrahedron in CELL_TETRAHEDRA:
+        case = (corner_inside[:, tetrahedron] << np.arange(4)).sum(axis=1)
+        for triangle in range(2):
+            edges = TETRAHEDRON_EDGES[case, triangle]
+            has_triangle = edges[:, 0, 0] >= 0
+            if not has_triangle.any():
+                continue
+            edges = edges[has_triangle]
+            cells = cell_index[has_triangle]
+            cell_values = corner_values[has_triangle]
+            cell_inside = corner_inside[has_triangle][:, tetrahedron]
+
+            # Cell corners at either end of the edge each vertex is on, as (T, 3) arrays
+            low_corner, high_corner = tetrahedron[edges[..., 0]], tetrahedron[edges[..., 1]]
+            low_value = np.take_along_axis(cell_values, low_corner, axis=1)
+            high_value = np.take_along_axis(cell_values, high_corner, axis=1)
+            fraction = (level - low_value) / (high_value - low_value)
+
+            low_point = cells[:, None, :] + CELL_CORNERS[low_corner]
+            high_point = cells[:, None, :] + CELL_CORNERS[high_corner]
+            low_position = np.stack([coordinates[axis][low_point[..., axis]] for axis in range(3)], axis=-1)
+            high_position = np.stack([coordinates[axis][high_point[..., axis]] for axis in range(3)], axis=-1)
+            triangle_positions = low_position + fraction[..., None] * (high_position - low_position)
+
+            low_linear = np.ravel_multi_index(np.moveaxis(low_point, -1, 0), sampled_shape)
+            high_linear = np.ravel_multi_index(np.moveaxis(high_point, -1, 0), sampled_shape)
+            edge_keys = (np.minimum(low_linear, high_linear) * int(np.prod(sampled_shape))
+                         + np.maximum(low_linear, high_linear))
+
+            # Flip triangles whose normal points towards the corners above the isovalue
+            corner_positions = CELL_CORNERS[tetrahedron].astype(float)
+            inside_center = (cell_inside @ corner_positions) / cell_inside.sum(axis=1, keepdims=True)
+            outside_center = (~cell_inside @ corner_positions) / (~cell_inside).sum(axis=1, keepdims=True)
+            normals = np.cross(triangle_positions[:, 1] - triangle_positions[:, 0],
+                               triangle_positions[:, 2] - triangle_positions[:, 0])
+            is_flipped = np.einsum("ij,ij->i", normals, inside_center - outside_center) > 0
+
+            keys.append(edge_keys.reshape(-1))
+            positions.append(triangle_positions.reshape(-1, 3))
+            flipped.append(is_flipped)
+    return np.concatenate(keys), np.concatenate(positions), np.concatenate(flipped)
+
+
+def evict_cache(cache_directory: str = CACHE_DIRECTORY, max_age: Real = CACHE_MAX_AGE,
+                max_bytes: int = CACHE_MAX_BYTES, keep: str = None) -> None:
+    """Removes cached grids that haven't been used for a while, then the least recently used ones until the
+    cache fits in its size limit. Grids that are still memory-mapped stay readable until they're closed.
+
+    Args:
+        cache_directory (str, optional): Directory the cache files are kept in. Defaults to the system's temp dir.
+        max_age (Real, optional): Grids unused for longer than this many seconds are removed. Defaults to a week.
+        max_bytes (int, optional): Most bytes the cache can take up. Defaults to 4 GiB. Use 0 to clear it.
+        keep (str, optional): Path to a cache file that's never removed, such as the one just read.
+    """
+    if not os.path.isdir(cache_directory):
+        return
+    now = time.time()
+    entries = _cache_entries(cache_directory, now - max_age, keep)
+    total_bytes = sum(size for _, size, _ in entries)
+    if keep is not None and os.path.exists(keep):
+        total_bytes += os.path.getsize(keep)
+
+    for last_used, size, path in sorted(entries):
+        if now - last_used > max_age or total_bytes > max_bytes:
+            try:
+                os.remove(path)
+            except OSError:
+                # Another Blender may be parsing into it, or have it open
+                continue
+            total_bytes -= size
+
+
+def _cache_entries(cache_directory: str, stale_before: Real, keep: str = None) -> List[Tuple[Real, int, str]]:
+    """Lists the files in the cache that may be evicted: every cached grid, and partial grids that are stale.
+
+    Args:
+        cache_directory (str): Directory the cache files are kept in.
+        stale_before (Real): Partial grids last written to before this time are stale.
+        keep (str, optional): Path to a cache file that's left out.
+
+    Returns:
+        List[Tuple[Real, int, str]]: Last use time, size in bytes, and path of each file. Partial grids count
+                                     as taking no space, so they aren't removed just to make room.
+    """
+    entries = []
+    for entry in os.scandir(cache_directory):
+        if not entry.is_file() or entry.path == keep:
+            continue
+        status = entry.stat()
+        if entry.name.endswith(".npy"):
+            entries.append((status.st_mtime, status.st_size, entry.path))
+        elif status.st_mtime < stale_before:
+            # Left behind by a Blender that closed while parsing. Recent ones may still be being written to.
+            entries.append((status.st_mtime, 0, entry.path))
+    return entries
+
+
+def _cache_path(filepath: str, cache_directory: str) -> str:
+    """Names the cache file of a grid after the file's path, size, and modification time,
+    so that a file that changed on disk is parsed again.
+
+    Args:
+        filepath (str): Path to the file with volumetric data.
+        cache_directory (str): Directory the cache files are kept in.
+
+    Returns:
+        str: Path to the cache file.
+    """
+    status = os.stat(filepath)
+    signature = f"{os.path.abspath(filepath)}:{status.st_size}:{status.st_mtime_ns}"
+    return os.path.join(cache_directory, f"{hashlib.sha1(signature.encode()).hexdigest()}.npy")
+
+
+def _stream_grid(file: IO[str], cache_path: str, shape: Tuple[int, ...], fortran_order: bool,
+                 scale: Real = 1.0) -> np.ndarray:
+    """Parses whitespace-separated values from an open text file into a memory-mapped array, a chunk of lines
+    at a time. Each chunk is parsed by numpy, without going through a list of Python strings.
+    If the grid has already been cached, the cache is mapped instead, and the file isn't read.
+
+    Args:
+        file (IO[str]): File, positioned at the first value.
+        cache_path (str): Path to the cache file.
+        shape (Tuple[int, ...]): Shape of the array.
+        fortran_order (bool): Whether the values are written with the first index changing fastest.
+        scale (Real, optional): Factor the values are multiplied by before they're cached. Defaults to 1.
+
+    Raises:
+        ValueError: If the file ends before the grid is complete.
+
+    Returns:
+        np.ndarray: Read-only memory-mapped array.
+    """
+    if os.path.exists(cache_path):
+        # Mark the grid as recently used, so it's the last to be evicted
+        os.utime(cache_path)
+        return np.load(cache_path, mmap_mode="r")
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    partial_path = f"{cache_path}.{os.getpid()}.partial"
+    grid = np.lib.format.open_memmap(partial_path, mode="w+", dtype=np.float32, shape=shape,
+                                     fortran_order=fortran_order)
+    flat = None
+    try:
+        flat = grid.reshape(-1, order="F" if fortran_order else "C")
+        num_read = 0
+        while num_read < len(flat):
+            # The chunk is finished off with the rest of its last line, so no value is split between chunks
+            text = file.read(CHUNK_CHARACTERS) + file.readline()
+            if not text:
+                raise ValueError(f"Expected {len(flat)} grid values, but the file ends after {num_read}")
+            values = _parse_values(text, len(flat) - num_read)
+            flat[num_read:num_read + len(values)] = values * scale
+            num_read += len(values)
+        grid.flush()
+    except BaseException:
+        # The partial file is removed, so that a failed parse doesn't leave anything in the cache
+        grid = flat = None
+        os.remove(partial_path)
+        raise
+    del grid, flat
+    os.replace(partial_path, cache_path)
+    return np.load(cache_path, mmap_mode="r")
+
+
+def _parse_values(text: str, count: int) -> np.ndarray:
+    """Parses up to a number of whitespace-separated values from the start of a text. Only the values are
+    parsed, as some formats carry on with other data after a grid (such as the augmentation occupancies VASP
+    writes after each grid), so the text is only split into tokens when something other than numbers follows.
+
+    Args:
+        text (str): Text starting with the values.
+        count (int): Most values to parse.
+
+    Raises:
+        ValueError: If something that isn't a number comes before the values end.
+
+    Returns:
+        np.ndarray: The values, of which there are fewer than count if the text ends first.
+    """
+    if not text.strip():
+        # numpy parses blank text as a single -1
+        return np.empty(0, dtype=np.float32)
+    with warnings.catch_warnings():
+        # Older versions of numpy only warn when they stop at something that isn't a number
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            return np.fromstring(text, dtype=np.float32, sep=" ")[:count]
+        except (ValueError, DeprecationWarning):
+            pass
+        # Cut the text just before the first token after the values, found from the bytes of the text
+        characters = np.frombuffer(text.encode("latin-1", errors="replace"), dtype=np.uint8)
+        is_space = characters <= ord(" ")
+        token_starts = np.flatnonzero(~is_space & np.concatenate([[True], is_space[:-1]]))
+        if len(token_starts) <= count:
+            raise ValueError("Found something that isn't a number among the grid values")
+        try:
+            return np.fromstring(text[:token_starts[count]], dtype=np.float32, sep=" ")
+        except DeprecationWarning as warning:
+            raise ValueError(str(warning)) from None
+
+
+def _read_cube(filepath: str, cache_path: str, orbital: int = 0) -> VolumetricGrid:
+    """Reads a Gaussian cube file. Cube files with a negative number of atoms store orbitals, listed after the
+    atoms, with one value per orbital at each grid point. Every orbital is cached, and one of them is read.
+    Cube files are almost always written for molecules, so both the grid and the atoms are non-periodic:
+    bonds and contacts don't wrap across the box, just as the isosurfaces stay open at its edges.
+    The atoms keep the box as their cell.
+
+    Args:
+        filepath (str): Path to the cube file.
+        cache_path (str): Path to the cache file of the grid.
+        orbital (int, optional): Which of the stored orbitals to read, counting from 0. Defaults to 0.
+
+    Raises:
+        ValueError: If the file doesn't have the orbital.
+
+    Returns:
+        VolumetricGrid: The grid, and the structure stored with it.
+    """
+    with open(filepath) as file:
+        file.readline()
+        file.readline()
+        header = file.readline().split()
+        num_atoms = int(header[0])
+        num_values = int(header[4]) if len(header) > 4 else 1
+        origin = np.array(header[1:4], dtype=float) * ase.units.Bohr
+
+        shape, axes = [], np.empty((3, 3))
+        for axis in range(3):
+            size, *step = file.readline().split()
+            # A negative number of points means the steps are already in Angstrom
+            shape.append(abs(int(size)))
+            axes[axis] = np.array(step, dtype=float) * (1 if int(size) < 0 else ase.units.Bohr)
+
+        atom_lines = [file.readline().split() for _ in range(abs(num_atoms))]
+        numbers = np.array([int(line[0]) for line in atom_lines], dtype=int)
+        positions = np.array([line[2:5] for line in atom_lines], dtype=float).reshape(-1, 3) * ase.units.Bohr
+        if num_atoms < 0:
+            # The number of orbitals comes first, followed by their labels, possibly over several lines
+            labels = file.readline().split()
+            while len(labels) < int(labels[0]) + 1:
+                labels += file.readline().split()
+            num_values = int(labels[0])
+        if not 0 <= orbital < num_values:
+            raise ValueError(f"{os.path.basename(filepath)} stores {num_values} orbitals, so it has no orbital "
+                             f"{orbital}")
+
+        cell = axes * np.array(shape)[:, None]
+        atoms = ase.Atoms(numbers=numbers, positions=positions, cell=cell, pbc=False)
+        data = _stream_grid(file, cache_path, (*shape, num_values), fortran_order=False)[..., orbital]
+    return VolumetricGrid(atoms, data, origin, axes, periodic=False)
+
+
+def _read_chgcar(filepath: str, cache_path: str) -> VolumetricGrid:
+    """Reads a VASP CHGCAR-style file. The structure is read by ASE, and the grid after it is streamed.
+    Only the first grid is kept (the total density, for spin-polarized calculations). Like ASE, the values are
+    divided by the cell volume, as VASP stores them multiplied by it.
+
+    Args:
+        filepath (str): Path to the file.
+        cache_path (str): Path to the cache file of the grid.
+
+    Raises:
+        ValueError: If the file has no grid after the structure.
+
+    Returns:
+        VolumetricGrid: The grid, and the structure stored with it.
+    """
+    with open(filepath) as file:
+        # The structure ends at the first blank line, and the grid's dimensions are on the line after it.
+        # Only the structure is handed to ASE, which would otherwise take the dimensions for velocities.
+        header = []
+        for line in file:
+            if not line.strip():
+                break
+            header.append(line)
+        atoms = ase.io.read(io.StringIO("".join(header)), format="vasp")
+        line = file.readline()
+        while line and not line.strip():
+            line = file.readline()
+        if not line:
+            raise ValueError(f"No volumetric data found after the structure in {os.path.basename(filepath)}")
+        shape = tuple(int(size) for size in line.split())
+        data = _stream_grid(file, cache_path, shape, fortran_order=True, scale=1 / atoms.get_volume())
+    axes = atoms.cell.array / np.array(shape)[:, None]
+    return VolumetricGrid(atoms, data, np.zeros(3), axes, periodic=True)